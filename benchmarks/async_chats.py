@@ -0,0 +1,53 @@
+"""
+Пропускная способность sync- и async-представлений чатов под ASGI.
+
+Gunicorn с воркером uvicorn запускается дважды: с ASYNC_CHAT_VIEWS=0
+(синхронные представления выполняются в пуле потоков) и с ASYNC_CHAT_VIEWS=1.
+Для каждого числа одновременных соединений нагружается --path. Нужны база
+и пользователь с чатами, как для posts_rps.py:
+
+    python benchmarks/async_chats.py --username user --password password \
+        --path /api/chats/1/messages/
+"""
+
+import argparse
+
+from posts_rps import obtain_token
+from throughput_scaling import run_load, start_server, wait_ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bind", default="127.0.0.1:8050")
+    parser.add_argument("--path", default="/api/chats/")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    args = parser.parse_args()
+
+    base_url = f"http://{args.bind}"
+    for mode, async_views in (("sync", "0"), ("async", "1")):
+        server = start_server(
+            args.bind,
+            args.workers,
+            1,
+            "uvicorn",
+            ASYNC_CHAT_VIEWS=async_views,
+        )
+        try:
+            wait_ready(base_url)
+            token = obtain_token(base_url, args.username, args.password)
+            url = f"{base_url}{args.path}"
+            run_load(url, token, 100, 8)
+            for concurrency in args.concurrency:
+                rps = run_load(url, token, args.requests, concurrency)
+                print(f"{mode:5}   concurrency: {concurrency:4}   req/s: {rps:8.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Замер запросов в секунду на /api/posts/ работающего сервера.
+
+Сравнение без постоянных соединений и с ними:
+
+    DB_CONN_MAX_AGE=0 python manage.py runserver --noreload
+    python benchmarks/posts_rps.py --username user --password password
+
+    DB_CONN_MAX_AGE=60 python manage.py runserver --noreload
+    python benchmarks/posts_rps.py --username user --password password
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def obtain_token(base_url, username, password):
+    request = urllib.request.Request(
+        f"{base_url}/api/token/",
+        data=json.dumps({"username": username, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["access"]
+
+
+def fetch(url, token):
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/posts/")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    token = obtain_token(args.base_url, args.username, args.password)
+    url = f"{args.base_url}{args.path}"
+    for _ in range(args.warmup):
+        fetch(url, token)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(
+            executor.map(lambda _: fetch(url, token), range(args.requests))
+        )
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests:    {args.requests}")
+    print(f"concurrency: {args.concurrency}")
+    print(f"req/s:       {args.requests / elapsed:.1f}")
+    print(f"p50, ms:     {statistics.median(latencies) * 1000:.2f}")
+    print(f"p95, ms:     {latencies[int(len(latencies) * 0.95)] * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Время запуска Django и накладные расходы на запрос для профилей настроек.
+
+Запрос идет на /api/posts/ без токена: ответ 401 формируется без обращения
+к базе, поэтому замер показывает стоимость middleware и DRF.
+
+    python benchmarks/settings_overhead.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / "testgram"
+
+MEASURE = """
+import json, sys, time
+
+started = time.perf_counter()
+import django
+
+django.setup()
+startup = time.perf_counter() - started
+
+from django.test import Client
+
+client = Client()
+requests = int(sys.argv[1])
+for _ in range(20):
+    client.get("/api/posts/")
+started = time.perf_counter()
+for _ in range(requests):
+    client.get("/api/posts/")
+print(json.dumps([startup, (time.perf_counter() - started) / requests]))
+"""
+
+
+def measure(profile, requests):
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "config.settings",
+        "DJANGO_ENV": profile,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE, str(requests)],
+        cwd=PROJECT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    for profile in ("dev", "prod"):
+        results = [measure(profile, args.requests) for _ in range(args.runs)]
+        startup = statistics.median(result[0] for result in results)
+        per_request = statistics.median(result[1] for result in results)
+        print(
+            f"{profile:5} startup: {startup * 1000:7.1f} ms"
+            f"   per request: {per_request * 1000:6.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
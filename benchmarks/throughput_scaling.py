@@ -0,0 +1,105 @@
+"""
+Пропускная способность gunicorn в зависимости от числа воркеров.
+
+Для каждого числа воркеров запускается gunicorn с config/gunicorn.conf.py
+и нагружается /api/posts/. Нужны база и пользователь, как для posts_rps.py:
+
+    python benchmarks/throughput_scaling.py --username user --password password
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from posts_rps import fetch, obtain_token
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / "testgram"
+
+
+def start_server(bind, workers, threads, worker_class, **extra_env):
+    env = {
+        **os.environ,
+        "DJANGO_ENV": os.environ.get("DJANGO_ENV", "prod"),
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+        "GUNICORN_BIND": bind,
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "GUNICORN_WORKER_CLASS": worker_class,
+        "GUNICORN_ACCESS_LOG": "",
+        **extra_env,
+    }
+    return subprocess.Popen(
+        ["gunicorn", "-c", "config/gunicorn.conf.py"],
+        cwd=PROJECT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/api/posts/")
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.2)
+        else:
+            return
+    raise RuntimeError("Server did not start")
+
+
+def run_load(url, token, requests, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: fetch(url, token), range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    cpu_count = multiprocessing.cpu_count()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bind", default="127.0.0.1:8050")
+    parser.add_argument("--path", default="/api/posts/")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, *(2**i for i in range(cpu_count.bit_length())), cpu_count}),
+    )
+    args = parser.parse_args()
+
+    base_url = f"http://{args.bind}"
+    print(f"cpu count: {cpu_count}")
+    for workers in args.workers:
+        server = start_server(args.bind, workers, args.threads, args.worker_class)
+        try:
+            wait_ready(base_url)
+            token = obtain_token(base_url, args.username, args.password)
+            url = f"{base_url}{args.path}"
+            concurrency = workers * args.threads * 2
+            run_load(url, token, concurrency * 5, concurrency)
+            rps = run_load(url, token, args.requests, concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"workers: {workers:3}   concurrency: {concurrency:4}   req/s: {rps:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,29 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("ASYNC_CHAT_VIEWS", "1")
 
-application = get_asgi_application()
+# Приложение Django создается до импорта кода, использующего модели.
+django_asgi_application = get_asgi_application()
+if settings.SERVE_STATIC:
+    django_asgi_application = ASGIStaticFilesHandler(django_asgi_application)
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from general.api.authentication import JWTAuthMiddleware  # noqa: E402
+from general.api.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter(
+    {
+        "http": django_asgi_application,
+        "websocket": AllowedHostsOriginValidator(
+            JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        ),
+    }
+)
@@ -0,0 +1,40 @@
+"""
+Конфигурация gunicorn, все параметры читаются из окружения.
+
+    gunicorn -c config/gunicorn.conf.py
+
+GUNICORN_WORKER_CLASS=uvicorn переключает на ASGI-воркеры uvicorn (так
+запускается docker-compose). WebSocket ws/chats/<id>/ и ожидание сообщений
+работают только в этом режиме, воркеры gthread (WSGI) их не обслуживают.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+if os.environ.get("GUNICORN_WORKER_CLASS", "gthread") == "uvicorn":
+    worker_class = "uvicorn.workers.UvicornWorker"
+    wsgi_app = "config.asgi:application"
+    # Под ASGI каждый запрос выполняет синхронный код в своем потоке,
+    # и постоянные соединения с базой не переиспользуются, а копятся.
+    os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+else:
+    worker_class = "gthread"
+    wsgi_app = "config.wsgi:application"
+
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Плавный перезапуск воркеров после заданного числа запросов.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+reload = os.environ.get("GUNICORN_RELOAD", "0") == "1"
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
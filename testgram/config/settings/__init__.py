@@ -0,0 +1,7 @@
+import os
+
+# Профиль настроек выбирается переменной окружения DJANGO_ENV: dev или prod.
+if os.environ.get("DJANGO_ENV", "dev") == "prod":
+    from config.settings.prod import *  # noqa: F401, F403
+else:
+    from config.settings.dev import *  # noqa: F401, F403
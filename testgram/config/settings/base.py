@@ -0,0 +1,254 @@
+"""
+Base Django settings for testgram project.
+
+Profiles extending these settings live next to this module, see
+config/settings/__init__.py.
+
+Generated by 'django-admin startproject' using Django 5.0.3.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.0/ref/settings/
+"""
+
+import os
+from datetime import timedelta
+from pathlib import Path
+
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = "django-insecure-z@7#7l_=5hyqh5elrj=%^9+hm*^6x@8!b4b+tlue$(c@y@vjg*"
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = ["*"]
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "rest_framework",
+    "drf_spectacular",
+    "rest_framework_simplejwt",
+    "django_filters",
+    "general",
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "general.middleware.ReplicaMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "config.urls"
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "general.api.authentication.StatelessJWTAuthentication",
+    ),
+    "DEFAULT_PERMISSION_CLASSES": [
+        "rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly"
+    ],
+    "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_RENDERER_CLASSES": [
+        "general.api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "PAGE_SIZE": 10,
+    "DATETIME_FORMAT": "%Y-%m-%dT%H:%M:%S",
+    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+}
+
+SPECTACULAR_SETTINGS = {
+    "TITLE": "Your Project API",
+    "DESCRIPTION": "Your project description",
+    "VERSION": "1.0.0",
+    "SERVE_INCLUDE_SCHEMA": False,
+    # OTHER SETTINGS
+}
+
+# Посты авторов, у которых друзей больше порога, не раскладываются по лентам
+# при публикации, а подмешиваются в ленту при чтении.
+FEED_FANOUT_MAX_FRIENDS = int(os.environ.get("FEED_FANOUT_MAX_FRIENDS", 1000))
+FEED_FANOUT_IN_BACKGROUND = True
+FEED_FANOUT_WORKERS = int(os.environ.get("FEED_FANOUT_WORKERS", 2))
+FEED_FANOUT_BATCH_SIZE = 1000
+# Сколько последних постов нового друга добавляется в ленту.
+FEED_BACKFILL_POSTS = 50
+
+# Версии постов и признаки активности пользователей должны быть общими
+# для всех воркеров, поэтому в prod нужен redis или memcached (pymemcache).
+# Кеш в памяти процесса (locmem) подходит только для разработки и тестов.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[os.environ.get("CACHE_BACKEND", "locmem")],
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# Время жизни закешированных постов, в секундах.
+POST_CACHE_TIMEOUT = int(os.environ.get("POST_CACHE_TIMEOUT", 60))
+
+# Кеш кратких данных пользователей в памяти процесса, 0 - отключён.
+SHORT_USER_CACHE_SIZE = int(os.environ.get("SHORT_USER_CACHE_SIZE", 0))
+SHORT_USER_CACHE_TTL = int(os.environ.get("SHORT_USER_CACHE_TTL", 30))
+
+# Списки пользователей, постов, чатов и сообщений сериализуются
+# напрямую из QuerySet.values(), минуя поля DRF.
+FAST_READ_SERIALIZERS = os.environ.get("FAST_READ_SERIALIZERS", "0") == "1"
+
+# Список чатов, история и отправка сообщений обслуживаются async-представлениями
+# (под ASGI не занимают поток на время запросов к базе). По умолчанию включено
+# только при запуске через config.asgi: под WSGI async-представления лишь
+# добавляют переключения между потоками.
+ASYNC_CHAT_VIEWS = os.environ.get("ASYNC_CHAT_VIEWS", "0") == "1"
+
+# Ожидание новых сообщений в /api/chats/<id>/messages/wait/: наибольший
+# таймаут в секундах и число сообщений в ответе.
+MESSAGES_WAIT_TIMEOUT = int(os.environ.get("MESSAGES_WAIT_TIMEOUT", 25))
+MESSAGES_WAIT_LIMIT = 100
+
+# Как ожидающие узнают о новых сообщениях: local - в пределах процесса,
+# postgres - через LISTEN/NOTIFY между всеми процессами.
+MESSAGE_NOTIFIER = os.environ.get("MESSAGE_NOTIFIER", "local")
+
+# Размер пачки строк, которые выгрузки читают из базы за раз.
+EXPORT_CHUNK_SIZE = 2000
+
+# Сколько секунд кешируется признак активности пользователя из токена.
+AUTH_USER_STATUS_TIMEOUT = 30
+
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "general.api.serializers.TokenObtainPairSerializer",
+}
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+
+# Pub/sub для WebSocket. InMemoryChannelLayer работает в пределах процесса,
+# в prod используется channels_redis (config.settings.prod).
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+    },
+}
+
+# Database
+# https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("DB_NAME"),
+        "USER": os.environ.get("DB_USER"),
+        "PASSWORD": os.environ.get("DB_PASSWORD"),
+        "HOST": os.environ.get("DB_HOST"),
+        "PORT": os.environ.get("DB_PORT"),
+        # Соединение переиспользуется между запросами, пока не истечет
+        # CONN_MAX_AGE; перед повторным использованием оно проверяется.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_CONN_HEALTH_CHECKS", "1") == "1",
+        "OPTIONS": {},
+    }
+}
+
+# Реплика для чтения безопасных запросов, в тестах - зеркало основной базы.
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "HOST": os.environ.get("DB_REPLICA_HOST", DATABASES["default"]["HOST"]),
+    "PORT": os.environ.get("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+    "OPTIONS": {**DATABASES["default"]["OPTIONS"]},
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_REPLICAS = ["replica"] if os.environ.get("DB_REPLICA_HOST") else []
+DATABASE_ROUTERS = ["general.db_routers.PrimaryReplicaRouter"]
+# Сколько секунд после записи клиент читает с основной базы.
+REPLICA_PIN_SECONDS = 5
+
+# Password validation
+# https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+AUTH_USER_MODEL = "general.User"
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.0/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "Europe/Moscow"
+
+USE_I18N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.0/howto/static-files/
+
+STATIC_URL = "static/"
+
+# Раздача статики (админка, DRF) самим приложением, когда перед ним нет
+# веб-сервера. Файлы берутся из приложений, collectstatic не нужен.
+SERVE_STATIC = os.environ.get("SERVE_STATIC", "0") == "1"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -0,0 +1,16 @@
+import socket
+
+from config.settings.base import *  # noqa: F401, F403
+from config.settings.base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+hostname, _, ips = socket.gethostbyname_ex(socket.gethostname())
+INTERNAL_IPS = [ip[: ip.rfind(".")] + ".1" for ip in ips] + [
+    "127.0.0.1",
+    "10.0.2.2",
+]
+
+INSTALLED_APPS = [*INSTALLED_APPS, "debug_toolbar"]
+
+MIDDLEWARE = ["debug_toolbar.middleware.DebugToolbarMiddleware", *MIDDLEWARE]
@@ -0,0 +1,78 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from config.settings.base import *  # noqa: F401, F403
+from config.settings.base import CACHE_BACKENDS, REST_FRAMEWORK, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get("SECRET_KEY")
+if not SECRET_KEY:
+    raise ImproperlyConfigured(
+        "SECRET_KEY environment variable is required with DJANGO_ENV=prod."
+    )
+
+ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "*").split(",")
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "redis")
+if CACHE_BACKEND == "locmem":
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND=locmem is per-process, use redis or memcached in prod."
+    )
+CACHE_LOCATION = os.environ.get("CACHE_LOCATION", "redis://redis:6379/0")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": CACHE_LOCATION,
+    }
+}
+
+# InMemoryChannelLayer не доставляет события в сокеты других воркеров,
+# поэтому в prod слой каналов всегда на redis, по умолчанию тот же, что у кеша.
+CHANNEL_LAYER_LOCATION = os.environ.get(
+    "CHANNEL_LAYER_LOCATION", CACHE_LOCATION if CACHE_BACKEND == "redis" else ""
+)
+if not CHANNEL_LAYER_LOCATION.startswith(("redis://", "rediss://", "unix://")):
+    raise ImproperlyConfigured(
+        "CHANNEL_LAYER_LOCATION must be a redis URL in prod, "
+        "InMemoryChannelLayer is per-process."
+    )
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {"hosts": [CHANNEL_LAYER_LOCATION]},
+    },
+}
+
+# Ожидание сообщений должно будиться из любого воркера.
+MESSAGE_NOTIFIER = os.environ.get("MESSAGE_NOTIFIER", "postgres")
+if MESSAGE_NOTIFIER == "local":
+    raise ImproperlyConfigured(
+        "MESSAGE_NOTIFIER=local is per-process, use postgres in prod."
+    )
+
+# Только JSON: BrowsableAPIRenderer нужен лишь для разработки.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ["general.api.renderers.FastJSONRenderer"],
+}
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
+        },
+    },
+]
@@ -7,8 +7,28 @@ admin.site.register(Chat)
 admin.site.unregister(Group)
 
 
+class ChangedFieldsSaveMixin:
+    """
+    При изменении сохраняет только поля, измененные в форме.
+
+    Полное сохранение затерло бы счетчики (friend_count, *_count),
+    которые обновляются параллельно запросами через F().
+    """
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        fields = obj._meta.concrete_fields
+        update_fields = [
+            field.name
+            for field in fields
+            if field.name in form.changed_data or getattr(field, "auto_now", False)
+        ]
+        obj.save(update_fields=update_fields)
+
+
 @admin.register(User)
-class UserModelAdmin(admin.ModelAdmin):
+class UserModelAdmin(ChangedFieldsSaveMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "first_name",
@@ -69,22 +89,17 @@ class UserModelAdmin(admin.ModelAdmin):
 
 
 @admin.register(Post)
-class PostModelAdmin(admin.ModelAdmin):
+class PostModelAdmin(ChangedFieldsSaveMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "author",
         "title",
         "get_body",
         "created_at",
-        "get_comment_count",
+        "comment_count",
     )
     list_display_links = ("id", "title")
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related("comments")
-
-    def get_comment_count(self, obj):
-        return obj.comments.count()
+    list_select_related = ("author",)
 
     def get_body(self, obj):
         max_length = 64
@@ -93,7 +108,6 @@ class PostModelAdmin(admin.ModelAdmin):
         return obj.body
 
     get_body.short_description = "body"
-    get_comment_count.short_description = "comment count"
 
 
 @admin.register(Comment)
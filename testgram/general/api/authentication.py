@@ -0,0 +1,97 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from general.models import User
+
+# Поля пользователя, которые записываются в токен при выдаче.
+USER_CLAIMS = ("first_name", "last_name", "is_active")
+
+
+def user_status_key(user_id):
+    return f"user:{user_id}:is_active"
+
+
+def is_user_active(user_id):
+    key = user_status_key(user_id)
+    is_active = cache.get(key)
+    if is_active is None:
+        is_active = bool(
+            User.objects.filter(pk=user_id).values_list("is_active", flat=True).first()
+        )
+        cache.set(key, is_active, timeout=settings.AUTH_USER_STATUS_TIMEOUT)
+    return is_active
+
+
+def invalidate_user_status(user_id):
+    cache.delete(user_status_key(user_id))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без чтения пользователя из базы на каждый запрос.
+
+    Пользователь собирается из claims токена, остальные поля отложены
+    и загружаются при первом обращении. Удаление и деактивация
+    проверяются по кешу статуса с коротким временем жизни.
+    """
+
+    def get_user(self, validated_token):
+        # Токены, выданные до появления claims, и проверка смены пароля
+        # требуют полной загрузки пользователя.
+        if api_settings.CHECK_REVOKE_TOKEN or any(
+            claim not in validated_token for claim in USER_CLAIMS
+        ):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not is_user_active(user_id):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return User.from_db(
+            router.db_for_read(User),
+            ["id", "first_name", "last_name", "is_active"],
+            [
+                user_id,
+                validated_token["first_name"],
+                validated_token["last_name"],
+                True,
+            ],
+        )
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Аутентификация WebSocket-подключений по access-токену.
+
+    Браузер не может передать заголовок Authorization при открытии
+    WebSocket, поэтому токен передается в параметре `token`.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope, user=await self.get_user(scope))
+        return await super().__call__(scope, receive, send)
+
+    @database_sync_to_async
+    def get_user(self, scope):
+        token = parse_qs(scope["query_string"].decode()).get("token")
+        if not token:
+            return AnonymousUser()
+        authentication = StatelessJWTAuthentication()
+        try:
+            return authentication.get_user(authentication.get_validated_token(token[0]))
+        except (InvalidToken, AuthenticationFailed):
+            return AnonymousUser()
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def post_version_key(post_id):
+    return f"post:{post_id}:version"
+
+
+def post_fragment_key(post_id, name, version):
+    return f"post:{post_id}:{name}:{version}"
+
+
+def get_post_versions(post_ids):
+    keys = {post_version_key(post_id): post_id for post_id in post_ids}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Начальная версия уникальна, чтобы после вытеснения ключа версии
+        # не прочитать фрагменты, сохранённые до вытеснения.
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def _bump_post_versions(post_ids):
+    for post_id in post_ids:
+        try:
+            cache.incr(post_version_key(post_id))
+        except ValueError:
+            cache.set(post_version_key(post_id), time.time_ns(), timeout=None)
+
+
+def invalidate_posts(post_ids):
+    post_ids = list(post_ids)
+    _bump_post_versions(post_ids)
+    # Повторно после коммита: параллельный запрос мог успеть закешировать
+    # данные, прочитанные до коммита, под уже новой версией.
+    transaction.on_commit(lambda: _bump_post_versions(post_ids))
+
+
+def get_post_fragments(post_ids, name, load):
+    """
+    Возвращает сериализованные посты из кеша, недостающие строит `load`.
+
+    `load(ids)` должен вернуть словарь {id: данные} для переданных id.
+    Версии читаются до обращения к базе, поэтому фрагмент, построенный
+    во время параллельной записи, сохраняется под устаревшей версией.
+    """
+    versions = get_post_versions(post_ids)
+    keys = {
+        post_fragment_key(post_id, name, version): post_id
+        for post_id, version in versions.items()
+    }
+    fragments = {keys[key]: data for key, data in cache.get_many(keys).items()}
+
+    missing = [post_id for post_id in post_ids if post_id not in fragments]
+    if missing:
+        loaded = load(missing)
+        cache.set_many(
+            {
+                post_fragment_key(post_id, name, versions[post_id]): data
+                for post_id, data in loaded.items()
+            },
+            timeout=settings.POST_CACHE_TIMEOUT,
+        )
+        fragments.update(loaded)
+    return fragments
+
+
+class LRUCache:
+    """
+    LRU-кеш в памяти процесса с временем жизни записей.
+
+    Другие процессы не узнают об инвалидации, поэтому устаревшие данные
+    живут в них не дольше `ttl` секунд. При `maxsize=0` кеш отключён.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not self.maxsize:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+short_user_cache = LRUCache(
+    settings.SHORT_USER_CACHE_SIZE, settings.SHORT_USER_CACHE_TTL
+)
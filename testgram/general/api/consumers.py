@@ -0,0 +1,103 @@
+from urllib.parse import parse_qs, urlencode
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from django.db.models import Q
+from django.urls import reverse
+
+from general.api.pagination import KeysetPagination
+
+from general.models import Chat, Message
+from general.realtime import chat_group_name, message_event
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Доставляет участникам чата новые сообщения.
+
+    Подключение: ws/chats/<chat_id>/?token=<access>[&after=<id сообщения>].
+    С `after` сначала отправляются сообщения, пропущенные после указанного,
+    затем новые. Формат сообщений совпадает с /api/chats/<id>/messages/.
+    Пропущенных отправляется не больше MESSAGES_WAIT_LIMIT, самые новые;
+    если их было больше, перед ними приходит {"history": <ссылка>} на
+    более старые сообщения в HTTP-истории.
+    """
+
+    async def connect(self):
+        self.group_name = None
+        self.replayed_ids = set()
+        user = self.scope["user"]
+        chat_id = self.scope["url_route"]["kwargs"]["chat_id"]
+        after = parse_qs(self.scope["query_string"].decode()).get("after", [None])[0]
+
+        if not user.is_authenticated or not await self.is_participant(user, chat_id):
+            await self.close()
+            return
+        if after is not None and not after.isdigit():
+            await self.close()
+            return
+
+        # Подписка до чтения пропущенных сообщений, чтобы не потерять
+        # отправленные между чтением и подпиской.
+        self.group_name = chat_group_name(chat_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        if after is not None:
+            messages, history = await self.get_messages_after(chat_id, int(after))
+            if history is not None:
+                await self.send_json({"history": history})
+            for message in messages:
+                self.replayed_ids.add(message["id"])
+                await self.send_message(message)
+
+    async def disconnect(self, code):
+        if self.group_name is not None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def chat_message(self, event):
+        message = event["message"]
+        if message["id"] not in self.replayed_ids:
+            await self.send_message(message)
+
+    async def send_message(self, message):
+        if message["author_id"] == self.scope["user"].pk:
+            message_author = "Вы"
+        else:
+            message_author = message["author_name"]
+        await self.send_json(
+            {
+                "id": message["id"],
+                "content": message["content"],
+                "message_author": message_author,
+                "created_at": message["created_at"],
+            }
+        )
+
+    @database_sync_to_async
+    def is_participant(self, user, chat_id):
+        return Chat.objects.filter(Q(user_1=user) | Q(user_2=user), pk=chat_id).exists()
+
+    @database_sync_to_async
+    def get_messages_after(self, chat_id, message_id):
+        limit = settings.MESSAGES_WAIT_LIMIT
+        rows = list(
+            Message.objects.filter(chat=chat_id, id__gt=message_id)
+            .order_by("-id")
+            .values_list(
+                "id", "content", "author_id", "author__first_name", "created_at"
+            )[: limit + 1]
+        )
+        history = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            message_id, *_, created_at = rows[-1]
+            cursor = KeysetPagination().encode_cursor(
+                {"id": message_id, "created_at": created_at}
+            )
+            history = "{}?{}".format(
+                reverse("chats-messages", kwargs={"pk": chat_id}),
+                urlencode({"before": cursor}),
+            )
+        return [message_event(*row) for row in reversed(rows)], history
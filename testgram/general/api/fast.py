@@ -0,0 +1,148 @@
+from operator import itemgetter
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from general.api.serializers import truncate_body
+from general.models import Reaction
+
+
+class ValuesSerializer:
+    """
+    Сериализатор только для чтения, который строит ответ из строк QuerySet.values().
+
+    Поля DRF не используются: для каждого поля заранее собирается функция
+    от строки. Результат должен совпадать с выводом соответствующего
+    ModelSerializer, это проверяется в tests_fast.
+    """
+
+    values = ()
+
+    def __init__(self, context):
+        self.context = context
+        self.fields = tuple(self.get_fields().items())
+
+    def get_fields(self):
+        raise NotImplementedError
+
+    def get_queryset(self, queryset):
+        return queryset.values(*self.values)
+
+    def to_representation(self, row):
+        return {name: field(row) for name, field in self.fields}
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+    def datetime_field(self, name):
+        output_format = api_settings.DATETIME_FORMAT
+        if output_format is None:
+            return itemgetter(name)
+        if output_format.lower() == ISO_8601:
+            to_representation = serializers.DateTimeField().to_representation
+        else:
+            field_timezone = (
+                timezone.get_current_timezone() if settings.USE_TZ else None
+            )
+
+            def to_representation(value):
+                if field_timezone is not None and timezone.is_aware(value):
+                    value = value.astimezone(field_timezone)
+                return value.strftime(output_format)
+
+        def get_value(row):
+            value = row[name]
+            return None if value is None else to_representation(value)
+
+        return get_value
+
+
+class UserListValuesSerializer(ValuesSerializer):
+    values = ("id", "first_name", "last_name", "is_friend")
+
+    def get_fields(self):
+        return {name: itemgetter(name) for name in self.values}
+
+
+class PostListValuesSerializer(ValuesSerializer):
+    reaction_values = tuple(Reaction.Values.values)
+    values = (
+        "id",
+        "author_id",
+        "author__first_name",
+        "author__last_name",
+        "title",
+        "body",
+        "comment_count",
+        "created_at",
+        *(f"{value}_count" for value in reaction_values),
+    )
+
+    def get_fields(self):
+        my_reactions = self.context["my_reactions"]
+        return {
+            "id": itemgetter("id"),
+            "author": lambda row: {
+                "id": row["author_id"],
+                "first_name": row["author__first_name"],
+                "last_name": row["author__last_name"],
+            },
+            "title": itemgetter("title"),
+            "body": lambda row: truncate_body(row["body"]),
+            "my_reaction": lambda row: my_reactions.get(row["id"], ""),
+            "reactions": lambda row: {
+                value: row[f"{value}_count"] for value in self.reaction_values
+            },
+            "comment_count": itemgetter("comment_count"),
+            "created_at": self.datetime_field("created_at"),
+        }
+
+
+class ChatListValuesSerializer(ValuesSerializer):
+    values = (
+        "id",
+        "user_2_id",
+        "user_1__first_name",
+        "user_1__last_name",
+        "user_2__first_name",
+        "user_2__last_name",
+        "last_message_content",
+        "last_message_datetime",
+        "last_message_author_id",
+    )
+
+    def get_fields(self):
+        user_id = self.context["request"].user.pk
+
+        def companion_name(row):
+            companion = "user_1" if row["user_2_id"] == user_id else "user_2"
+            return f"{row[f'{companion}__first_name']} {row[f'{companion}__last_name']}"
+
+        def last_message_author(row):
+            if not row["last_message_author_id"]:
+                return None
+            elif row["last_message_author_id"] == user_id:
+                return "Вы"
+            return companion_name(row)
+
+        return {
+            "id": itemgetter("id"),
+            "companion_name": companion_name,
+            "last_message_content": itemgetter("last_message_content"),
+            "last_message_datetime": self.datetime_field("last_message_datetime"),
+            "last_message_author": last_message_author,
+        }
+
+
+class MessageListValuesSerializer(ValuesSerializer):
+    values = ("id", "content", "message_author", "created_at")
+
+    def get_fields(self):
+        return {
+            "id": itemgetter("id"),
+            "content": itemgetter("content"),
+            "message_author": itemgetter("message_author"),
+            "created_at": self.datetime_field("created_at"),
+        }
@@ -0,0 +1,431 @@
+import base64
+import binascii
+import json
+from itertools import chain
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import (
+    EmptyPage,
+    InvalidPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator, который не считает большие выборки целиком.
+
+    Точный COUNT выполняется не дальше `count_threshold` строк. Если строк
+    больше, количество оценивается по статистике Postgres: pg_class.reltuples
+    для таблицы без фильтров, иначе по оценке планировщика из EXPLAIN.
+    """
+
+    count_threshold = 10000
+    count_is_estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        count = queryset[: self.count_threshold + 1].count()
+        if count <= self.count_threshold:
+            return count
+        self.count_is_estimated = True
+        return max(self.estimate_count(queryset), count)
+
+    def validate_number(self, number):
+        if self.count <= self.count_threshold:
+            return super().validate_number(number)
+        # Оценка может быть меньше реального числа строк, поэтому
+        # номер страницы сверху не ограничивается.
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimated:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        return ApproximateCountPage(
+            rows[: self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    def estimate_count(self, queryset):
+        with connections[queryset.db].cursor() as cursor:
+            if not queryset.query.has_filters():
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                return int(cursor.fetchone()[0])
+
+            sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class ApproximateCountPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    django_paginator_class = ApproximateCountPaginator
+
+
+class OrderedUnion:
+    """
+    UNION ALL нескольких querysets с общей сортировкой для Paginator.
+
+    Срез [start:stop] берет из каждого queryset не больше stop первых строк,
+    поэтому каждый читается по своему индексу, а страница собирается
+    слиянием уже упорядоченных частей.
+    """
+
+    def __init__(self, querysets, ordering):
+        self.querysets = list(querysets)
+        self.ordering = ordering
+
+    def union(self, querysets):
+        return querysets[0].union(*querysets[1:], all=True)
+
+    def count_queryset(self):
+        return self.union([queryset.values("pk") for queryset in self.querysets])
+
+    def count(self):
+        return self.count_queryset().count()
+
+    async def acount(self):
+        return await self.count_queryset().acount()
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice) or k.stop is None:
+            raise TypeError("OrderedUnion supports only slices with a stop.")
+        if k.stop <= (k.start or 0):
+            # Пустой срез делает querysets пустыми, и union() их отбрасывает.
+            # Возвращается QuerySet, чтобы его можно было читать и через async for.
+            return self.querysets[0].none()
+        querysets = [
+            queryset.order_by(*self.ordering)[: k.stop] for queryset in self.querysets
+        ]
+        return self.union(querysets).order_by(*self.ordering)[k]
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination для async-представлений (adrf).
+
+    COUNT и строки страницы читаются через async ORM.
+    """
+
+    async def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        bottom = (number - 1) * paginator.per_page
+        top = bottom + paginator.per_page
+        if top + paginator.orphans >= paginator.count:
+            top = paginator.count
+        rows = [row async for row in queryset[bottom:top]]
+        self.page = paginator._get_page(rows, number, paginator)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по ключу сортировки без OFFSET и COUNT.
+
+    `before` возвращает записи старше курсора, `after` - новее курсора.
+    Каждая страница - это диапазонное сканирование индекса по полям `ordering`.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    before_query_param = "before"
+    after_query_param = "after"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        before = self.init_request(queryset, request)
+        if self.after is not None:
+            rows = self.get_rows(queryset, self.after, True, self.page_size)
+        else:
+            rows = self.get_rows(queryset, before, False, self.page_size + 1)
+        return self.set_page(rows)
+
+    def init_request(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.after = self.decode_cursor(queryset, self.after_query_param)
+        return self.decode_cursor(queryset, self.before_query_param)
+
+    def set_page(self, rows):
+        if self.after is not None:
+            rows.reverse()
+            self.has_older = bool(rows)
+        else:
+            self.has_older = len(rows) > self.page_size
+            rows = rows[: self.page_size]
+
+        self.page = rows
+        return rows
+
+    def get_rows(self, queryset, position, reverse, limit):
+        return list(self.get_rows_queryset(queryset, position, reverse, limit))
+
+    def get_rows_queryset(self, queryset, position, reverse, limit):
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position, reverse))
+        return queryset.order_by(*self.get_ordering(reverse))[:limit]
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return self.ordering
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def get_keyset_filter(self, position, reverse):
+        keyset_filter = None
+        for field, value in reversed(list(zip(self.ordering, position))):
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            lookup = "lt" if descending != reverse else "gt"
+            condition = Q(**{f"{name}__{lookup}": value})
+            if keyset_filter is not None:
+                condition |= Q(**{name: value}) & keyset_filter
+            keyset_filter = condition
+
+        # Дополнительное условие по первому полю ограничивает диапазон индекса.
+        field = self.ordering[0]
+        lookup = "lte" if field.startswith("-") != reverse else "gte"
+        return Q(**{f"{field.lstrip('-')}__{lookup}": position[0]}) & keyset_filter
+
+    def get_position(self, row):
+        position = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            position.append(value)
+        return position
+
+    def encode_cursor(self, row):
+        position = [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in self.get_position(row)
+        ]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, queryset, query_param):
+        encoded = self.request.query_params.get(query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            return [
+                self.to_python(queryset, field.lstrip("-"), value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (
+            binascii.Error,
+            UnicodeDecodeError,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, queryset, name, value):
+        if name in queryset.query.annotations:
+            field = queryset.query.annotations[name].output_field
+        else:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return value
+        return field.to_python(value)
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_next_link(self):
+        if not self.page or not self.has_older:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.after_query_param
+        )
+        return replace_query_param(
+            url, self.before_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_previous_link(self):
+        if self.page:
+            cursor = self.encode_cursor(self.page[0])
+        elif self.after is not None:
+            cursor = self.request.query_params[self.after_query_param]
+        else:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.before_query_param
+        )
+        return replace_query_param(url, self.after_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {
+                "name": query_param,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": "string"},
+            }
+            for query_param, description in (
+                (self.before_query_param, "Cursor of older records."),
+                (self.after_query_param, "Cursor of newer records."),
+            )
+        ]
+        if self.page_size_query_param:
+            parameters.append(
+                {
+                    "name": self.page_size_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Number of results to return per page.",
+                    "schema": {"type": "integer"},
+                }
+            )
+        return parameters
+
+
+class AsyncKeysetPagination(KeysetPagination):
+    """KeysetPagination для async-представлений (adrf)."""
+
+    async def paginate_queryset(self, queryset, request, view=None):
+        before = self.init_request(queryset, request)
+        if self.after is not None:
+            rows = await self.aget_rows(queryset, self.after, True, self.page_size)
+        else:
+            rows = await self.aget_rows(queryset, before, False, self.page_size + 1)
+        return self.set_page(rows)
+
+    async def aget_rows(self, queryset, position, reverse, limit):
+        return [
+            row
+            async for row in self.get_rows_queryset(queryset, position, reverse, limit)
+        ]
+
+
+class MergedKeysetPagination(KeysetPagination):
+    """
+    Keyset-пагинация по нескольким querysets с общими полями сортировки.
+
+    Каждый queryset читается своим диапазоном индекса, страницы сливаются в памяти.
+    """
+
+    def get_rows(self, querysets, position, reverse, limit):
+        rows = {
+            row.pk: row
+            for row in chain.from_iterable(
+                super(MergedKeysetPagination, self).get_rows(
+                    queryset, position, reverse, limit
+                )
+                for queryset in querysets
+            )
+        }
+        descending = self.ordering[0].startswith("-")
+        return sorted(
+            rows.values(), key=self.get_position, reverse=descending != reverse
+        )[:limit]
+
+    def to_python(self, querysets, name, value):
+        return super().to_python(querysets[0], name, value)
+
+
+class FeedPagination(MergedKeysetPagination):
+    # Поля аннотируются в general.feed.get_feed_querysets.
+    ordering = ("-feed_created_at", "-feed_id")
+
+
+class CommentPagination(KeysetPagination):
+    # Комментарии поста читаются по индексу (post, id).
+    ordering = ("-id",)
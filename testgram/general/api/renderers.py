@@ -0,0 +1,85 @@
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson, если он установлен.
+
+    Вывод совпадает с JSONRenderer: даты, Decimal и ленивые строки
+    кодируются его encoder_class. Без orjson, при запросе с отступами
+    и для данных, которые orjson не умеет кодировать, используется
+    стандартный json.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.dumps(data)
+
+    def dumps(self, data):
+        if orjson is not None:
+            try:
+                ret = orjson.dumps(
+                    data,
+                    default=self.encoder_class().default,
+                    option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+                )
+            except orjson.JSONEncodeError:
+                pass
+            else:
+                # Как и JSONRenderer, экранируем разделители строк для JavaScript.
+                return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                    b"\xe2\x80\xa9", b"\\u2029"
+                )
+        return super().render(data)
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Ответ с JSON-массивом, который кодируется и отдаётся частями.
+
+    Подходит для выгрузок по QuerySet.iterator(): весь ответ
+    не собирается в памяти. Под ASGI нужно передавать асинхронный
+    итератор (QuerySet.aiterator()): синхронный Django перед отправкой
+    читает целиком.
+    """
+
+    buffer_size = 64 * 1024
+
+    def __init__(self, items, renderer_class=FastJSONRenderer, **kwargs):
+        kwargs.setdefault("content_type", renderer_class.media_type)
+        if hasattr(items, "__aiter__"):
+            content = self.aencode(items, renderer_class())
+        else:
+            content = self.encode(items, renderer_class())
+        super().__init__(content, **kwargs)
+
+    def encode(self, items, renderer):
+        buffer = bytearray(b"[")
+        separator = b""
+        for item in items:
+            buffer += separator + renderer.dumps(item)
+            separator = b","
+            if len(buffer) >= self.buffer_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]"
+        yield bytes(buffer)
+
+    async def aencode(self, items, renderer):
+        buffer = bytearray(b"[")
+        separator = b""
+        async for item in items:
+            buffer += separator + renderer.dumps(item)
+            separator = b","
+            if len(buffer) >= self.buffer_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]"
+        yield bytes(buffer)
@@ -0,0 +1,15 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme,
+    TokenObtainPairSerializerExtension,
+)
+
+# Расширения drf-spectacular для simplejwt сопоставляются только с самими
+# классами simplejwt, поэтому подклассы проекта регистрируются отдельно.
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    target_class = "general.api.authentication.StatelessJWTAuthentication"
+
+
+class ClaimsTokenObtainPairSerializerExtension(TokenObtainPairSerializerExtension):
+    target_class = "general.api.serializers.TokenObtainPairSerializer"
@@ -1,7 +1,14 @@
-from django.db.models import Q
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt import serializers as jwt_serializers
 
+from general.api.authentication import USER_CLAIMS
+from general.api.cache import invalidate_posts, short_user_cache
+from general.feed import schedule_fan_out, should_fan_out
 from general.models import User, Post, Comment, Reaction, Chat, Message
+from general.realtime import apublish_message, publish_message
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -23,24 +30,37 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             last_name=validated_data["last_name"],
         )
         user.set_password(validated_data["password"])
-        user.save()
+        user.save(update_fields=["password"])
 
         return user
 
 
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
 class UserListSerializer(serializers.ModelSerializer):
-    is_friend = serializers.SerializerMethodField()
+    is_friend = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = User
         fields = ("id", "first_name", "last_name", "is_friend")
 
-    def get_is_friend(self, obj) -> bool:
-        current_user = self.context["request"].user
-        return current_user in obj.friends.all()
+
+def truncate_body(body: str) -> str:
+    if len(body) > 128:
+        return body[:125] + "..."
+    return body
 
 
 class NestedPostListSerializer(serializers.ModelSerializer):
+    body = serializers.SerializerMethodField()
+
     class Meta:
         model = Post
         fields = (
@@ -50,11 +70,15 @@ class NestedPostListSerializer(serializers.ModelSerializer):
             "created_at",
         )
 
+    def get_body(self, obj) -> str:
+        return truncate_body(obj.body)
+
 
 class UserRetrieveSerializer(serializers.ModelSerializer):
-    is_friend = serializers.SerializerMethodField()
-    friend_count = serializers.SerializerMethodField()
-    posts = NestedPostListSerializer(many=True)
+    is_friend = serializers.BooleanField(read_only=True)
+    posts_count = serializers.IntegerField(read_only=True)
+    posts = NestedPostListSerializer(source="recent_posts", many=True, read_only=True)
+    posts_url = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -65,14 +89,16 @@ class UserRetrieveSerializer(serializers.ModelSerializer):
             "email",
             "is_friend",
             "friend_count",
+            "posts_count",
             "posts",
+            "posts_url",
         )
+        read_only_fields = ("friend_count",)
 
-    def get_friend_count(self, obj) -> int:
-        return obj.friends.count()
-
-    def get_is_friend(self, obj) -> bool:
-        return obj in self.context["request"].user.friends.all()
+    def get_posts_url(self, obj) -> str:
+        return reverse(
+            "users-posts", kwargs={"pk": obj.pk}, request=self.context["request"]
+        )
 
 
 class UserShortSerializer(serializers.ModelSerializer):
@@ -80,10 +106,27 @@ class UserShortSerializer(serializers.ModelSerializer):
         model = User
         fields = ("id", "first_name", "last_name")
 
+    def to_representation(self, instance):
+        # Один автор часто встречается на странице много раз, поэтому
+        # представление запоминается в контексте запроса.
+        memo = self.context.setdefault("short_users", {})
+        data = memo.get(instance.pk)
+        if data is None:
+            data = short_user_cache.get(instance.pk)
+            if data is None:
+                data = super().to_representation(instance)
+                short_user_cache.set(instance.pk, data)
+            memo[instance.pk] = data
+        return data
+
 
 class PostListSerializer(serializers.ModelSerializer):
     author = UserShortSerializer()
     body = serializers.SerializerMethodField()
+    my_reaction = serializers.SerializerMethodField()
+    reactions = serializers.DictField(
+        child=serializers.IntegerField(), source="reaction_counts", read_only=True
+    )
 
     class Meta:
         model = Post
@@ -92,18 +135,25 @@ class PostListSerializer(serializers.ModelSerializer):
             "author",
             "title",
             "body",
+            "my_reaction",
+            "reactions",
+            "comment_count",
             "created_at",
         )
 
     def get_body(self, obj) -> str:
-        if len(obj.body) > 128:
-            return obj.body[:125] + "..."
-        return obj.body
+        return truncate_body(obj.body)
+
+    def get_my_reaction(self, obj) -> str | None:
+        return self.context["my_reactions"].get(obj.pk, "")
 
 
 class PostRetrieveSerializer(serializers.ModelSerializer):
     author = UserShortSerializer()
     my_reaction = serializers.SerializerMethodField()
+    reactions = serializers.DictField(
+        child=serializers.IntegerField(), source="reaction_counts", read_only=True
+    )
 
     class Meta:
         model = Post
@@ -113,12 +163,13 @@ class PostRetrieveSerializer(serializers.ModelSerializer):
             "title",
             "body",
             "my_reaction",
+            "reactions",
+            "comment_count",
             "created_at",
         )
 
-    def get_my_reaction(self, obj) -> str:
-        reaction = self.context["request"].user.reactions.filter(post=obj).last()
-        return reaction.value if reaction else ""
+    def get_my_reaction(self, obj) -> str | None:
+        return self.context["my_reactions"].get(obj.pk, "")
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
@@ -135,6 +186,21 @@ class PostCreateSerializer(serializers.ModelSerializer):
             "body",
         )
 
+    def create(self, validated_data):
+        validated_data["in_timelines"] = should_fan_out(validated_data["author"])
+        post = super().create(validated_data)
+        schedule_fan_out(post)
+        return post
+
+    def update(self, instance, validated_data):
+        # Сохраняются только редактируемые поля: полное сохранение затерло бы
+        # счетчики реакций и комментариев, изменённые параллельно через F().
+        validated_data.pop("author", None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
+
 
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.HiddenField(
@@ -173,20 +239,12 @@ class ReactionSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        reaction = Reaction.objects.filter(
-            post=validated_data["post"],
-            author=validated_data["author"],
-        ).last()
-
-        if not reaction:
-            return Reaction.objects.create(**validated_data)
-
-        if reaction.value == validated_data["value"]:
-            reaction.value = None
-        else:
-            reaction.value = validated_data["value"]
-        reaction.save()
-
+        reaction = Reaction.objects.toggle(
+            validated_data["author"],
+            validated_data["post"],
+            validated_data["value"],
+        )
+        invalidate_posts([reaction.post_id])
         return reaction
 
 
@@ -204,26 +262,15 @@ class ChatSerializer(serializers.ModelSerializer):
         fields = ("id", "user_1", "user_2", "companion_id")
 
     def create(self, validated_data):
-        request_user = validated_data["user_1"]
-        second_user = validated_data["user_2"]
-
-        chat = Chat.objects.filter(
-            Q(user_1=request_user, user_2=second_user)
-            | Q(user_1=second_user, user_2=request_user)
-        ).first()
-        if not chat:
-            chat = Chat.objects.create(
-                user_1=request_user,
-                user_2=second_user,
-            )
-
-        return chat
+        return Chat.objects.get_or_create_pair(
+            validated_data["user_1"],
+            validated_data["user_2"],
+        )
 
     def get_companion_id(self, obj) -> int:
-        companion = (
-            obj.user_1 if obj.user_2 == self.context["request"].user else obj.user_2
-        )
-        return companion.id
+        if obj.user_2_id == self.context["request"].user.pk:
+            return obj.user_1_id
+        return obj.user_2_id
 
 
 class ChatListSerializer(serializers.ModelSerializer):
@@ -252,9 +299,9 @@ class ChatListSerializer(serializers.ModelSerializer):
         return f"{companion.first_name} {companion.last_name}"
 
     def get_last_message_author(self, obj) -> str | None:
-        if not obj.last_message_author:
+        if not obj.last_message_author_id:
             return None
-        elif self.context["request"].user.pk == obj.last_message_author:
+        elif self.context["request"].user.pk == obj.last_message_author_id:
             return "Вы"
         else:
             return self.get_companion_name(obj)
@@ -275,11 +322,35 @@ class MessageSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         chat = attrs["chat"]
-        author = attrs["author"]
-        if chat.user_1 != author and chat.user_2 != author:
+        if attrs["author"].pk not in (chat.user_1_id, chat.user_2_id):
             raise serializers.ValidationError("Вы не являетесь участником этого чата.")
         return super().validate(attrs)
 
+    def create(self, validated_data):
+        with transaction.atomic():
+            message = super().create(validated_data)
+            message.chat.push_last_message(message)
+            transaction.on_commit(lambda: publish_message(message))
+        return message
+
+    async def acreate(self, validated_data):
+        # В async ORM нет транзакций. Обновление last_message условное,
+        # поэтому порядок при конкурентной отправке сохраняется, а после
+        # сбоя между запросами чат восстанавливает backfill_chat_last_message.
+        message = await Message.objects.acreate(**validated_data)
+        await message.chat.apush_last_message(message)
+        await apublish_message(message)
+        return message
+
     class Meta:
         model = Message
         fields = ("id", "author", "content", "chat", "created_at")
+
+
+class MessageWaitSerializer(serializers.Serializer):
+    after = serializers.IntegerField(min_value=0)
+    timeout = serializers.FloatField(
+        min_value=0,
+        max_value=settings.MESSAGES_WAIT_TIMEOUT,
+        default=settings.MESSAGES_WAIT_TIMEOUT,
+    )
@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from general.api.views import (
+    ChatViewSet,
+    MessageViewSet,
+    AsyncChatViewSet,
+    AsyncMessageViewSet,
+)
+from general.factories import UserFactory, ChatFactory, MessageFactory
+from general.models import Chat
+from general.realtime import MessageNotifier, PostgresMessageNotifier
+
+
+class AsyncChatViewsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.factory = APIRequestFactory()
+
+    def call(self, viewset, action, method, path, data=None, **kwargs):
+        initkwargs = getattr(getattr(viewset, action), "kwargs", {})
+        view = viewset.as_view({method: action}, **initkwargs)
+        if viewset.view_is_async:
+            view = async_to_sync(view)
+        request = getattr(self.factory, method)(path, data=data, format="json")
+        force_authenticate(request, user=self.user)
+        response = view(request, **kwargs)
+        if response.streaming:
+            return response
+        return response.render()
+
+    def assertSameContent(self, action, path, **kwargs):
+        response = self.call(ChatViewSet, action, "get", path, **kwargs)
+        async_response = self.call(AsyncChatViewSet, action, "get", path, **kwargs)
+        self.assertEqual(response.status_code, async_response.status_code)
+        self.assertEqual(response.content, async_response.content)
+
+    def test_chat_list(self):
+        self.assertSameContent("list", "/api/chats/")
+        self.assertSameContent("list", "/api/chats/?empty=0")
+
+        users = UserFactory.create_batch(12)
+        for i, user in enumerate(users):
+            chat = ChatFactory(user_1=self.user, user_2=user)
+            if i % 3:
+                MessageFactory(chat=chat, author=[self.user, user][i % 2])
+
+        self.assertSameContent("list", "/api/chats/")
+        self.assertSameContent("list", "/api/chats/?page=2")
+        self.assertSameContent("list", "/api/chats/?page=3")
+        self.assertSameContent("list", "/api/chats/?empty=1")
+
+    def test_messages(self):
+        companion = UserFactory()
+        chat = ChatFactory(user_1=companion, user_2=self.user)
+        for i in range(15):
+            MessageFactory(chat=chat, author=[self.user, companion][i % 2])
+
+        response = self.call(
+            AsyncChatViewSet,
+            "messages",
+            "get",
+            f"/api/chats/{chat.pk}/messages/",
+            pk=chat.pk,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in ("", "?page_size=5", f"?{response.data['next'].split('?')[1]}"):
+            path = f"/api/chats/{chat.pk}/messages/{query}"
+            self.assertSameContent("messages", path, pk=chat.pk)
+
+    def test_export_messages(self):
+        companion = UserFactory()
+        chat = ChatFactory(user_1=companion, user_2=self.user)
+        for i in range(5):
+            MessageFactory(chat=chat, author=[self.user, companion][i % 2])
+        path = f"/api/chats/{chat.pk}/messages/export/"
+
+        response = self.call(ChatViewSet, "export_messages", "get", path, pk=chat.pk)
+        async_response = self.call(
+            AsyncChatViewSet, "export_messages", "get", path, pk=chat.pk
+        )
+        self.assertFalse(response.is_async)
+        self.assertTrue(async_response.is_async)
+
+        async def read(streaming_content):
+            return b"".join([chunk async for chunk in streaming_content])
+
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            async_to_sync(read)(async_response.streaming_content),
+        )
+
+    def test_messages_of_other_chat(self):
+        chat = ChatFactory()
+        response = self.client.get(f"/api/chats/{chat.pk}/messages/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(user=self.user)
+        for pk in (chat.pk, "abc"):
+            response = self.client.get(f"/api/chats/{pk}/messages/")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_message(self):
+        chat = ChatFactory(user_1=self.user)
+        data = {"chat": chat.pk, "content": "Привет"}
+        response = self.call(MessageViewSet, "create", "post", "/", data)
+        async_response = self.call(AsyncMessageViewSet, "create", "post", "/", data)
+        self.assertEqual(async_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(response.data) - {"id", "created_at"},
+            set(async_response.data) - {"id", "created_at"},
+        )
+
+        chat = Chat.objects.get(pk=chat.pk)
+        self.assertEqual(chat.last_message_id, async_response.data["id"])
+        self.assertEqual(chat.last_message_content, "Привет")
+        self.assertEqual(chat.last_message_author_id, self.user.pk)
+
+        other_chat = ChatFactory()
+        response = self.call(
+            AsyncMessageViewSet,
+            "create",
+            "post",
+            "/",
+            {"chat": other_chat.pk, "content": "Привет"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class WaitMessagesTestCase(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.companion = UserFactory()
+        self.chat = ChatFactory(user_1=self.user, user_2=self.companion)
+        self.factory = AsyncRequestFactory()
+
+    async def wait(self, params, chat=None):
+        chat = chat or self.chat
+        request = self.factory.get(f"/api/chats/{chat.pk}/messages/wait/", params)
+        force_authenticate(request, user=self.user)
+        view = AsyncChatViewSet.as_view({"get": "wait_messages"})
+        return await view(request, pk=chat.pk)
+
+    async def send_message(self, content):
+        request = self.factory.post(
+            "/api/messages/",
+            {"chat": self.chat.pk, "content": content},
+            content_type="application/json",
+        )
+        force_authenticate(request, user=self.companion)
+        return await AsyncMessageViewSet.as_view({"post": "create"})(request)
+
+    async def test_return_new_messages(self):
+        messages = [
+            await sync_to_async(MessageFactory)(
+                chat=self.chat, author=[self.user, self.companion][i % 2]
+            )
+            for i in range(4)
+        ]
+        response = await self.wait({"after": messages[1].pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [message["id"] for message in results], [m.pk for m in messages[2:]]
+        )
+        self.assertEqual(results[0]["message_author"], "Вы")
+        self.assertEqual(results[1]["message_author"], self.companion.first_name)
+
+    async def test_timeout(self):
+        started = time.monotonic()
+        response = await self.wait({"after": 0, "timeout": 0.2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"results": []})
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    async def test_wake_up_on_new_message(self):
+        async def send_message():
+            await asyncio.sleep(0.2)
+            return await self.send_message("Привет")
+
+        started = time.monotonic()
+        response, created = await asyncio.gather(
+            self.wait({"after": 0, "timeout": 10}), send_message()
+        )
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "id": created.data["id"],
+                    "content": "Привет",
+                    "message_author": self.companion.first_name,
+                    "created_at": created.data["created_at"],
+                }
+            ],
+        )
+
+    async def test_invalid_params(self):
+        for params in ({}, {"after": "abc"}, {"after": 0, "timeout": 1000}):
+            response = await self.wait(params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other_chat = await sync_to_async(ChatFactory)()
+        response = await self.wait({"after": 0, "timeout": 0}, chat=other_chat)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_require_asgi(self):
+        request = APIRequestFactory().get(
+            f"/api/chats/{self.chat.pk}/messages/wait/", {"after": 0}
+        )
+        force_authenticate(request, user=self.user)
+        view = AsyncChatViewSet.as_view({"get": "wait_messages"})
+        response = await view(request, pk=self.chat.pk)
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+
+class MessageNotifierTestCase(TransactionTestCase):
+    async def assertWakesUp(self, notifier):
+        async with notifier.subscribe(1) as event, notifier.subscribe(2) as other:
+            thread = threading.Thread(target=notifier.notify, args=(1,))
+            thread.start()
+            await asyncio.wait_for(event.wait(), 5)
+            thread.join()
+            self.assertFalse(other.is_set())
+
+    async def test_notify_from_other_thread(self):
+        await self.assertWakesUp(MessageNotifier())
+
+    async def test_postgres_notify(self):
+        notifier = PostgresMessageNotifier()
+        try:
+            await self.assertWakesUp(notifier)
+        finally:
+            notifier._listener.cancel()
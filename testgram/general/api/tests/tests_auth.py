@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from general.api.authentication import StatelessJWTAuthentication
+from general.factories import UserFactory, ChatFactory
+
+
+class StatelessJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.user.set_password("password")
+        self.user.save()
+
+    def obtain_token(self):
+        response = self.client.post(
+            "/api/token/",
+            data={"username": self.user.username, "password": "password"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["access"]
+
+    def test_token_claims(self):
+        token = AccessToken(self.obtain_token())
+        self.assertEqual(token["user_id"], self.user.pk)
+        self.assertEqual(token["first_name"], self.user.first_name)
+        self.assertEqual(token["last_name"], self.user.last_name)
+        self.assertTrue(token["is_active"])
+
+    def test_request_without_user_query(self):
+        ChatFactory.create_batch(2, user_1=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain_token()}")
+        self.client.get("/api/chats/")
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/chats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_user_is_loaded_lazily(self):
+        token = AccessToken(self.obtain_token())
+        with self.assertNumQueries(1):
+            user = StatelessJWTAuthentication().get_user(token)
+        self.assertEqual(user, self.user)
+        self.assertIn("email", user.get_deferred_fields())
+
+        with self.assertNumQueries(0):
+            user = StatelessJWTAuthentication().get_user(token)
+            self.assertEqual(user.first_name, self.user.first_name)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email)
+
+    def test_deactivated_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain_token()}")
+        self.assertEqual(self.client.get("/api/chats/").status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/chats/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain_token()}")
+        self.assertEqual(self.client.get("/api/chats/").status_code, status.HTTP_200_OK)
+
+        self.user.delete()
+        response = self.client.get("/api/chats/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_without_claims(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get("/api/chats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_schema_security_scheme(self):
+        generator = SchemaGenerator()
+        schema = generator.get_schema(request=None, public=True)
+        self.assertIn("jwtAuth", schema["components"]["securitySchemes"])
+        token_schema = schema["components"]["schemas"]["TokenObtainPair"]
+        self.assertIn("access", token_schema["properties"])
+        self.assertIn("refresh", token_schema["properties"])
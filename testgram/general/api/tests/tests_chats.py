@@ -1,7 +1,18 @@
+import base64
+import json
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TransactionTestCase
 from django.utils.timezone import make_naive
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from general.api.renderers import StreamingJSONResponse
 from general.factories import UserFactory, ChatFactory, MessageFactory
 from general.models import Chat, Message
 
@@ -85,6 +96,51 @@ class ChatTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(chats) - len(msgs), response.data["count"])
 
+    def test_chat_list_pages_with_same_datetime(self):
+        users = UserFactory.create_batch(12)
+        for i, user in enumerate(users):
+            if i % 2:
+                ChatFactory(user_1=self.user, user_2=user)
+            else:
+                ChatFactory(user_1=user, user_2=self.user)
+        ChatFactory.create_batch(3)
+        Chat.objects.update(last_message_datetime="2024-01-01T00:00:00Z")
+
+        response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.data["count"], 12)
+        chat_ids = [chat["id"] for chat in response.data["results"]]
+        response = self.client.get(path=response.data["next"], format="json")
+        chat_ids += [chat["id"] for chat in response.data["results"]]
+
+        expected_chat_ids = (
+            Chat.objects.filter(Q(user_1=self.user) | Q(user_2=self.user))
+            .order_by("-id")
+            .values_list("id", flat=True)
+        )
+        self.assertListEqual(chat_ids, list(expected_chat_ids))
+
+    def test_backfill_chat_last_message(self):
+        chat = ChatFactory(user_1=self.user)
+        MessageFactory(chat=chat)
+        message = MessageFactory(chat=chat, author=self.user)
+        empty_chat = ChatFactory(user_1=self.user)
+        Chat.objects.update(
+            last_message=None,
+            last_message_content=None,
+            last_message_author=None,
+            last_message_datetime=None,
+        )
+
+        call_command("backfill_chat_last_message", batch_size=1, stdout=StringIO())
+
+        chat.refresh_from_db()
+        self.assertEqual(chat.last_message, message)
+        self.assertEqual(chat.last_message_content, message.content)
+        self.assertEqual(chat.last_message_author, self.user)
+        self.assertEqual(chat.last_message_datetime, message.created_at)
+        empty_chat.refresh_from_db()
+        self.assertIsNone(empty_chat.last_message)
+
     def test_create_chat(self):
         user = UserFactory()
         data = {"user_2": user.pk}
@@ -126,6 +182,17 @@ class ChatTestCase(APITestCase):
         }
         self.assertDictEqual(expected_data, response.data)
 
+    def test_open_chat_queries(self):
+        user = UserFactory()
+        ChatFactory(user_1=user, user_2=self.user)
+        data = {"user_2": user.pk}
+
+        # выборка собеседника при валидации и один запрос на поиск/создание чата
+        with self.assertNumQueries(2):
+            response = self.client.post(path=self.url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["companion_id"], user.pk)
+
     def test_delete_chat(self):
         chat_1 = ChatFactory(user_1=self.user)
         chat_2 = ChatFactory(user_2=self.user)
@@ -163,7 +230,8 @@ class ChatTestCase(APITestCase):
         with self.assertNumQueries(2):
             response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 3)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 3)
 
         # сообщения приходят в порядке от новых к старым.
         # поэтому сначала проверяем message_3.
@@ -176,7 +244,7 @@ class ChatTestCase(APITestCase):
             ),
         }
         self.assertDictEqual(
-            response.data[0],
+            response.data["results"][0],
             message_3_expected_data,
         )
 
@@ -189,7 +257,7 @@ class ChatTestCase(APITestCase):
             ),
         }
         self.assertDictEqual(
-            response.data[1],
+            response.data["results"][1],
             message_2_expected_data,
         )
 
@@ -202,10 +270,73 @@ class ChatTestCase(APITestCase):
             ),
         }
         self.assertDictEqual(
-            response.data[2],
+            response.data["results"][2],
             message_1_expected_data,
         )
 
+    def test_get_messages_pagination(self):
+        chat = ChatFactory(user_1=self.user)
+        messages = MessageFactory.create_batch(25, author=self.user, chat=chat)
+        messages.reverse()
+        url = f"{self.url}{chat.pk}/messages/"
+
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [message["id"] for message in response.data["results"]],
+            [message.pk for message in messages[:10]],
+        )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(response.data["next"], format="json")
+        self.assertListEqual(
+            [message["id"] for message in response.data["results"]],
+            [message.pk for message in messages[10:20]],
+        )
+
+        response = self.client.get(response.data["next"], format="json")
+        self.assertListEqual(
+            [message["id"] for message in response.data["results"]],
+            [message.pk for message in messages[20:]],
+        )
+        self.assertIsNone(response.data["next"])
+
+        # более новые сообщения относительно второй страницы
+        response = self.client.get(response.data["previous"], format="json")
+        self.assertListEqual(
+            [message["id"] for message in response.data["results"]],
+            [message.pk for message in messages[10:20]],
+        )
+
+    def test_get_new_messages_after_cursor(self):
+        chat = ChatFactory(user_1=self.user)
+        MessageFactory.create_batch(3, author=self.user, chat=chat)
+        url = f"{self.url}{chat.pk}/messages/"
+
+        response = self.client.get(url, format="json")
+        poll_url = response.data["previous"]
+
+        response = self.client.get(poll_url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(response.data["results"], [])
+        self.assertEqual(response.data["previous"], poll_url)
+
+        new_messages = MessageFactory.create_batch(2, author=self.user, chat=chat)
+        response = self.client.get(poll_url, format="json")
+        self.assertListEqual(
+            [message["id"] for message in response.data["results"]],
+            [new_messages[1].pk, new_messages[0].pk],
+        )
+
+    def test_get_messages_invalid_cursor(self):
+        chat = ChatFactory(user_1=self.user)
+        wrong_types = base64.urlsafe_b64encode(json.dumps([[1], 1]).encode()).decode()
+        for cursor in ("invalid", wrong_types):
+            response = self.client.get(
+                f"{self.url}{chat.pk}/messages/?before={cursor}", format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_get_messages_from_foreign_chat(self):
         (user1, user2) = UserFactory.create_batch(2)
         chat = ChatFactory(user_1=user1, user_2=user2)
@@ -214,3 +345,74 @@ class ChatTestCase(APITestCase):
 
         response = self.client.get(path=f"{self.url}{chat.pk}/messages/")
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @mock.patch.object(StreamingJSONResponse, "buffer_size", 100)
+    def test_export_messages(self):
+        companion = UserFactory()
+        chat = ChatFactory(user_1=self.user, user_2=companion)
+        messages = [
+            MessageFactory(author=[self.user, companion][i % 2], chat=chat)
+            for i in range(5)
+        ]
+        MessageFactory.create_batch(3)
+
+        response = self.client.get(f"{self.url}{chat.pk}/messages/export/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertListEqual(
+            [message["id"] for message in data], [message.pk for message in messages]
+        )
+        self.assertDictEqual(
+            data[1],
+            {
+                "id": messages[1].pk,
+                "content": messages[1].content,
+                "message_author": companion.first_name,
+                "created_at": make_naive(messages[1].created_at).strftime(
+                    "%Y-%m-%dT%H:%M:%S"
+                ),
+            },
+        )
+
+    def test_export_messages_empty_chat(self):
+        chat = ChatFactory(user_1=self.user)
+        response = self.client.get(f"{self.url}{chat.pk}/messages/export/")
+        self.assertEqual(b"".join(response.streaming_content), b"[]")
+
+    def test_export_messages_from_foreign_chat(self):
+        chat = ChatFactory()
+        response = self.client.get(f"{self.url}{chat.pk}/messages/export/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ChatConcurrencyTestCase(TransactionTestCase):
+    def test_concurrent_get_or_create_pair(self):
+        users = UserFactory.create_batch(2)
+        barrier = threading.Barrier(4)
+        chats = []
+        errors = []
+
+        def open_chat(user_1, user_2):
+            try:
+                barrier.wait()
+                chats.append(Chat.objects.get_or_create_pair(user_1, user_2))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=open_chat, args=users[::step])
+            for step in (1, -1, 1, -1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(errors, [])
+        self.assertEqual(Chat.objects.count(), 1)
+        self.assertEqual({chat.pk for chat in chats}, {Chat.objects.get().pk})
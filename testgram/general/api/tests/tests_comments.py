@@ -1,9 +1,16 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
 from django.utils.timezone import make_naive
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.test import APITestCase
 
+from general.api.cache import short_user_cache
+from general.api.serializers import UserShortSerializer
 from general.factories import PostFactory, UserFactory, CommentFactory
-from general.models import Comment
+from general.models import Comment, Post
 
 
 class CommentTestCase(APITestCase):
@@ -27,6 +34,31 @@ class CommentTestCase(APITestCase):
         self.assertEqual(self.user, comment.author)
         self.assertIsNotNone(comment.created_at)
 
+    def test_comment_count(self):
+        data = {"post": self.post.pk, "body": "comment body"}
+        for _ in range(2):
+            response = self.client.post(path=self.url, data=data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
+        response = self.client.delete(path=f"{self.url}{response.data['id']}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(path=f"/api/posts/{self.post.pk}/", format="json")
+        self.assertEqual(response.data["comment_count"], 1)
+
+    def test_reconcile_comment_count(self):
+        CommentFactory.create_batch(3, post=self.post)
+        other_post = PostFactory()
+        Post.objects.update(comment_count=7)
+
+        call_command("reconcile_comment_count", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        other_post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 3)
+        self.assertEqual(other_post.comment_count, 0)
+
     def test_pass_incorrect_post_id(self):
         data = {"post": self.post.pk + 1, "body": "comment body"}
         response = self.client.post(path=self.url, data=data, format="json")
@@ -38,6 +70,21 @@ class CommentTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Comment.objects.count(), 0)
 
+    def test_concurrent_delete_decrements_once(self):
+        comment = CommentFactory(post=self.post, author=self.user)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=2)
+        # Второй запрос получил объект до того, как первый удалил строку.
+        Comment.objects.filter(pk=comment.pk).delete()
+        with mock.patch(
+            "general.api.views.CommentsViewSet.get_object", return_value=comment
+        ):
+            response = self.client.delete(
+                path=f"{self.url}{comment.pk}/", format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
     def test_delete_not_own_comment(self):
         comment = CommentFactory(post=self.post)
         response = self.client.delete(path=f"{self.url}{comment.pk}/", format="json")
@@ -56,6 +103,92 @@ class CommentTestCase(APITestCase):
         for comment in response.data["results"]:
             self.assertIn(comment["id"], comment_ids)
 
+    def test_comment_list_queries(self):
+        CommentFactory.create_batch(5, post=self.post)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"{self.url}?post__id={self.post.pk}", format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_comment_list_pagination(self):
+        comments = CommentFactory.create_batch(12, post=self.post)
+        CommentFactory.create_batch(3)
+        comment_ids = [comment.pk for comment in reversed(comments)]
+
+        url = f"{self.url}?post__id={self.post.pk}"
+        first_page = self.client.get(url, format="json")
+        self.assertListEqual(
+            [comment["id"] for comment in first_page.data["results"]],
+            comment_ids[:10],
+        )
+
+        response = self.client.get(first_page.data["next"], format="json")
+        self.assertListEqual(
+            [comment["id"] for comment in response.data["results"]], comment_ids[10:]
+        )
+        self.assertIsNone(response.data["next"])
+
+        new_comment = CommentFactory(post=self.post)
+        response = self.client.get(first_page.data["previous"], format="json")
+        self.assertListEqual(
+            [comment["id"] for comment in response.data["results"]], [new_comment.pk]
+        )
+
+    def count_short_user_serializations(self):
+        return mock.patch.object(
+            serializers.Serializer,
+            "to_representation",
+            autospec=True,
+            side_effect=serializers.Serializer.to_representation,
+        )
+
+    def test_comment_list_serializes_author_once(self):
+        authors = UserFactory.create_batch(2)
+        for i in range(8):
+            CommentFactory(post=self.post, author=authors[i % 2])
+
+        with self.count_short_user_serializations() as to_representation:
+            response = self.client.get(
+                f"{self.url}?post__id={self.post.pk}", format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        calls = [
+            call
+            for call in to_representation.call_args_list
+            if isinstance(call.args[0], UserShortSerializer)
+        ]
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(
+            {comment["author"]["id"] for comment in response.data["results"]},
+            {author.pk for author in authors},
+        )
+
+    def test_short_user_cache(self):
+        comment = CommentFactory(post=self.post)
+        url = f"{self.url}?post__id={self.post.pk}"
+
+        with mock.patch.object(short_user_cache, "maxsize", 100):
+            self.addCleanup(short_user_cache.clear)
+            self.client.get(url, format="json")
+            with self.count_short_user_serializations() as to_representation:
+                self.client.get(url, format="json")
+            self.assertFalse(
+                any(
+                    isinstance(call.args[0], UserShortSerializer)
+                    for call in to_representation.call_args_list
+                )
+            )
+
+            comment.author.first_name = "New name"
+            comment.author.save()
+            response = self.client.get(url, format="json")
+        self.assertEqual(
+            response.data["results"][0]["author"]["first_name"], "New name"
+        )
+
     def test_comment_data_structure(self):
         comment = CommentFactory(post=self.post)
         response = self.client.get(f"{self.url}?post__id={self.post.pk}", format="json")
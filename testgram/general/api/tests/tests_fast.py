@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from general.factories import (
+    UserFactory,
+    PostFactory,
+    ReactionFactory,
+    ChatFactory,
+    MessageFactory,
+)
+from general.models import Reaction
+
+
+class ValuesSerializerParityTestCase(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+
+    def assertSameContent(self, url):
+        response = self.client.get(url, format="json")
+        cache.clear()
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            fast_response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, fast_response.status_code)
+        self.assertEqual(response.content, fast_response.content)
+
+    def test_user_list(self):
+        users = UserFactory.create_batch(3)
+        self.user.friends.add(users[0])
+        self.assertSameContent("/api/users/")
+
+    def test_post_list(self):
+        posts = PostFactory.create_batch(3, body="x" * 200)
+        PostFactory(body="Короткий пост")
+        ReactionFactory(post=posts[0], author=self.user, value=Reaction.Values.SAD)
+        ReactionFactory(post=posts[1], value=Reaction.Values.HEART)
+        self.assertSameContent("/api/posts/")
+
+    def test_chat_list(self):
+        users = UserFactory.create_batch(3)
+        chats = [
+            ChatFactory(user_1=users[0], user_2=self.user),
+            ChatFactory(user_1=self.user, user_2=users[1]),
+            ChatFactory(user_1=users[2], user_2=self.user),
+        ]
+        MessageFactory(author=self.user, chat=chats[0])
+        MessageFactory(author=users[1], chat=chats[1])
+        self.assertSameContent("/api/chats/")
+
+    def test_message_list(self):
+        companion = UserFactory()
+        chat = ChatFactory(user_1=self.user, user_2=companion)
+        for i in range(12):
+            MessageFactory(author=[self.user, companion][i % 2], chat=chat)
+        self.assertSameContent(f"/api/chats/{chat.pk}/messages/")
+        self.assertSameContent(f"/api/chats/{chat.pk}/messages/?page_size=5")
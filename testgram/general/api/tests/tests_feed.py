@@ -0,0 +1,143 @@
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from general.factories import UserFactory, PostFactory
+from general.feed import fan_out_post
+from general.models import Post, TimelineEntry
+
+
+@override_settings(FEED_FANOUT_IN_BACKGROUND=False)
+class FeedTestCase(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.url = "/api/feed/"
+
+    def create_post(self, author):
+        self.client.force_authenticate(user=author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                path="/api/posts/",
+                data={"title": "title", "body": "body"},
+                format="json",
+            )
+        self.client.force_authenticate(user=self.user)
+        return response.data["id"]
+
+    def test_post_fan_out(self):
+        friend = UserFactory()
+        friend.friends.add(self.user)
+        stranger = UserFactory()
+
+        post_id = self.create_post(friend)
+        self.create_post(stranger)
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post_id).exists()
+        )
+        self.assertEqual(TimelineEntry.objects.count(), 1)
+
+    def test_feed(self):
+        friends = UserFactory.create_batch(2)
+        self.user.friends.add(*friends)
+        post_ids = [self.create_post(friends[i % 2]) for i in range(12)]
+        post_ids.reverse()
+        PostFactory.create_batch(3)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]], post_ids[:10]
+        )
+
+        response = self.client.get(path=response.data["next"], format="json")
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]], post_ids[10:]
+        )
+        self.assertIsNone(response.data["next"])
+
+    @override_settings(FEED_FANOUT_MAX_FRIENDS=2)
+    def test_feed_with_popular_friend(self):
+        popular_friend = UserFactory()
+        popular_friend.friends.add(self.user, *UserFactory.create_batch(2))
+        friend = UserFactory()
+        friend.friends.add(self.user)
+
+        post_ids = [
+            self.create_post(popular_friend),
+            self.create_post(friend),
+            self.create_post(popular_friend),
+        ]
+        post_ids.reverse()
+
+        self.assertFalse(TimelineEntry.objects.filter(post=post_ids[0]).exists())
+
+        response = self.client.get(path=f"{self.url}?page_size=2", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]], post_ids[:2]
+        )
+
+        response = self.client.get(path=response.data["next"], format="json")
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]], post_ids[2:]
+        )
+
+    @override_settings(FEED_BACKFILL_POSTS=2)
+    def test_add_friend_backfills_feed(self):
+        friend = UserFactory()
+        friend_post_ids = [self.create_post(friend) for _ in range(3)]
+        own_post_id = self.create_post(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                path=f"/api/users/{friend.pk}/add_friend/", format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(path=self.url, format="json")
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]],
+            friend_post_ids[:0:-1],
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=friend, post=own_post_id).exists()
+        )
+
+    @override_settings(FEED_FANOUT_MAX_FRIENDS=1)
+    def test_fan_out_decision_is_stored_on_post(self):
+        friend = UserFactory()
+        other_friend = UserFactory()
+        friend.friends.add(self.user, other_friend)
+        merged_id = self.create_post(friend)
+        friend.friends.remove(other_friend)
+        fanned_out_id = self.create_post(friend)
+
+        self.assertFalse(Post.objects.get(pk=merged_id).in_timelines)
+        self.assertTrue(Post.objects.get(pk=fanned_out_id).in_timelines)
+
+        response = self.client.get(path=self.url, format="json")
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]],
+            [fanned_out_id, merged_id],
+        )
+
+    def test_remove_friend_cleans_feed(self):
+        friend = UserFactory()
+        self.user.friends.add(friend)
+        post = PostFactory(author=friend)
+        fan_out_post(post.pk)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), 1)
+
+        self.client.post(path=f"/api/users/{friend.pk}/remove_friend/", format="json")
+
+        response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(response.data["results"], [])
+
+    def test_feed_logout(self):
+        self.client.logout()
+        response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -2,7 +2,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 
 from general.factories import UserFactory, ChatFactory, MessageFactory
-from general.models import Message
+from general.models import Message, Chat
 
 
 class MessageTestCase(APITestCase):
@@ -29,13 +29,16 @@ class MessageTestCase(APITestCase):
         self.assertEqual(message.chat, chat)
         self.assertEqual(message.content, data["content"])
 
+        chat.refresh_from_db()
+        self.assertEqual(chat.last_message, message)
+        self.assertEqual(chat.last_message_content, message.content)
+        self.assertEqual(chat.last_message_author, self.user)
+        self.assertEqual(chat.last_message_datetime, message.created_at)
+
     def test_try_to_create_message_for_other_chat(self):
         chat = ChatFactory()
         msg = MessageFactory.create_batch(5, chat=chat)
-        data = {
-            "chat": chat.pk,
-            "content": "message"
-        }
+        data = {"chat": chat.pk, "content": "message"}
 
         response = self.client.post(path=self.url, data=data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -50,6 +53,33 @@ class MessageTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Message.objects.count(), 0)
 
+    def test_delete_last_message(self):
+        chat = ChatFactory(user_1=self.user)
+        previous_message = MessageFactory(chat=chat)
+        message = MessageFactory(chat=chat, author=self.user)
+
+        response = self.client.delete(path=f"{self.url}{message.pk}/", format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        chat.refresh_from_db()
+        self.assertEqual(chat.last_message, previous_message)
+        self.assertEqual(chat.last_message_content, previous_message.content)
+        self.assertEqual(chat.last_message_author, previous_message.author)
+        self.assertEqual(chat.last_message_datetime, previous_message.created_at)
+
+        response = self.client.delete(
+            path=f"{self.url}{previous_message.pk}/", format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        previous_message.delete()
+        chat.refresh_last_message()
+        chat.refresh_from_db()
+        self.assertIsNone(chat.last_message)
+        self.assertIsNone(chat.last_message_content)
+        self.assertIsNone(chat.last_message_author)
+        self.assertIsNone(chat.last_message_datetime)
+
     def test_delete_other_message(self):
         companion = UserFactory()
         chat = ChatFactory(user_1=self.user, user_2=companion)
@@ -1,7 +1,12 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import make_naive
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from general.api.pagination import ApproximateCountPaginator
 from general.factories import UserFactory, PostFactory, ReactionFactory
 from general.models import Post, Reaction
 
@@ -44,6 +49,26 @@ class PostTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data["results"]), 5)
 
+    @mock.patch.object(ApproximateCountPaginator, "count_threshold", 3)
+    def test_post_list_approximate_count(self):
+        PostFactory.create_batch(12)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE general_post")
+
+        with self.assertNumQueries(5) as context:
+            response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 12)
+        self.assertIn("reltuples", context.captured_queries[1]["sql"])
+
+        response = self.client.get(path=f"{self.url}?page=2", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get(path=f"{self.url}?page=3", format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_post_list_data_structure(self):
         post = PostFactory()
         response = self.client.get(path=self.url, format="json")
@@ -59,6 +84,15 @@ class PostTestCase(APITestCase):
             },
             "title": post.title,
             "body": (post.body[:125] + "..." if len(post.body) > 128 else post.body),
+            "my_reaction": "",
+            "reactions": {
+                "smile": 0,
+                "thumb_up": 0,
+                "laugh": 0,
+                "sad": 0,
+                "heart": 0,
+            },
+            "comment_count": 0,
             "created_at": make_naive(post.created_at).strftime("%Y-%m-%dT%H:%M:%S"),
         }
 
@@ -72,6 +106,97 @@ class PostTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertDictEqual(expected_data, response.data["results"][0])
 
+    def test_post_list_reaction_counts(self):
+        posts = PostFactory.create_batch(3)
+        for post in posts:
+            ReactionFactory.create_batch(2, post=post, value=Reaction.Values.LAUGH)
+        ReactionFactory(post=posts[0], value=Reaction.Values.SAD)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reactions = {post["id"]: post["reactions"] for post in response.data["results"]}
+        self.assertEqual(reactions[posts[0].pk]["laugh"], 2)
+        self.assertEqual(reactions[posts[0].pk]["sad"], 1)
+        self.assertEqual(reactions[posts[1].pk]["laugh"], 2)
+        self.assertEqual(reactions[posts[1].pk]["sad"], 0)
+
+    def test_post_list_my_reaction(self):
+        posts = PostFactory.create_batch(12)
+        for post in posts[2:]:
+            ReactionFactory(post=post, author=self.user, value=Reaction.Values.SAD)
+            ReactionFactory(post=post, value=Reaction.Values.HEART)
+        ReactionFactory(post=posts[-1], author=UserFactory(), value=None)
+        ReactionFactory(post=posts[-2], value=Reaction.Values.SMILE)
+        reaction = posts[-2].reactions.get(author=self.user)
+        reaction.value = None
+        reaction.save()
+
+        with self.assertNumQueries(4):
+            response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        my_reactions = [post["my_reaction"] for post in response.data["results"]]
+        self.assertListEqual(my_reactions, [Reaction.Values.SAD, None] + ["sad"] * 8)
+
+        response = self.client.get(path=f"{self.url}?page=2", format="json")
+        my_reactions = [post["my_reaction"] for post in response.data["results"]]
+        self.assertListEqual(my_reactions, ["", ""])
+
+    def test_post_list_cache(self):
+        posts = PostFactory.create_batch(3)
+        self.client.get(path=self.url, format="json")
+
+        with self.assertNumQueries(3):
+            response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]],
+            [post.pk for post in reversed(posts)],
+        )
+
+        self.client.post(
+            path="/api/reactions/",
+            data={"post": posts[0].pk, "value": Reaction.Values.HEART},
+            format="json",
+        )
+        posts[1].title = "New title"
+        posts[1].save()
+
+        with self.assertNumQueries(4):
+            response = self.client.get(path=self.url, format="json")
+        results = {post["id"]: post for post in response.data["results"]}
+        self.assertEqual(results[posts[0].pk]["reactions"]["heart"], 1)
+        self.assertEqual(results[posts[0].pk]["my_reaction"], Reaction.Values.HEART)
+        self.assertEqual(results[posts[1].pk]["title"], "New title")
+
+    def test_retrieve_post_cache(self):
+        post = PostFactory(author=self.user)
+        url = f"{self.url}{post.pk}/"
+        self.client.get(path=url, format="json")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(path=url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], post.pk)
+
+        self.client.delete(path=url, format="json")
+        response = self.client.get(path=url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_post_invalid_id(self):
+        response = self.client.get(path=f"{self.url}abc/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_post_queries(self):
+        post = PostFactory()
+        ReactionFactory.create_batch(5, post=post)
+        with self.assertNumQueries(2):
+            response = self.client.get(path=f"{self.url}{post.pk}/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["reactions"]["smile"], 5)
+
     def test_post_list_logout(self):
         PostFactory.create_batch(5)
         self.client.logout()
@@ -96,6 +221,14 @@ class PostTestCase(APITestCase):
             "title": post.title,
             "body": post.body,
             "my_reaction": reaction.value,
+            "reactions": {
+                "smile": 0,
+                "thumb_up": 0,
+                "laugh": 0,
+                "sad": 0,
+                "heart": 1,
+            },
+            "comment_count": 0,
             "created_at": make_naive(post.created_at).strftime("%Y-%m-%dT%H:%M:%S"),
         }
         self.assertDictEqual(expected_data, response.data)
@@ -135,6 +268,22 @@ class PostTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertDictEqual(response.data, expected_data)
 
+    def test_update_post_keeps_counters(self):
+        post = PostFactory(author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                path=f"{self.url}{post.pk}/",
+                data={"title": "New title"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updates = [
+            query["sql"] for query in queries if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn("_count", updates[0])
+
     def test_update_foreign_post_with_patch(self):
         post = PostFactory(title="old title", body="old body here")
         post_data = {
@@ -1,8 +1,14 @@
+import threading
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from general.factories import UserFactory, PostFactory, ReactionFactory
-from general.models import Reaction
+from general.models import Post, Reaction
 
 
 class ReactionTestCase(APITestCase):
@@ -62,3 +68,94 @@ class ReactionTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(Reaction.objects.count(), 0)
 
+    def test_reaction_counts(self):
+        post = PostFactory()
+        ReactionFactory(post=post, value=Reaction.Values.SMILE)
+
+        data = {"post": post.pk, "value": "smile"}
+        self.client.post(path=self.url, data=data, format="json")
+        post.refresh_from_db()
+        self.assertEqual(post.smile_count, 2)
+
+        data = {"post": post.pk, "value": "heart"}
+        self.client.post(path=self.url, data=data, format="json")
+        post.refresh_from_db()
+        self.assertEqual(post.smile_count, 1)
+        self.assertEqual(post.heart_count, 1)
+
+        # повторная реакция снимает ее
+        self.client.post(path=self.url, data=data, format="json")
+        post.refresh_from_db()
+        self.assertEqual(post.smile_count, 1)
+        self.assertEqual(post.heart_count, 0)
+
+    def test_post_reaction_queries(self):
+        post = PostFactory()
+        data = {"post": post.pk, "value": "laugh"}
+
+        # выборка поста при валидации и один запрос на переключение реакции
+        with self.assertNumQueries(2):
+            response = self.client.post(path=self.url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_toggle(self):
+        posts = PostFactory.create_batch(3)
+        ReactionFactory(post=posts[0], author=self.user, value="sad")
+        ReactionFactory(post=posts[1], author=self.user, value="smile")
+
+        with self.assertNumQueries(1):
+            reactions = Reaction.objects.bulk_toggle(
+                self.user, {posts[0]: "heart", posts[1]: "smile", posts[2]: "laugh"}
+            )
+
+        self.assertListEqual(
+            [reaction.value for reaction in reactions], ["heart", None, "laugh"]
+        )
+        self.assertEqual(Reaction.objects.filter(author=self.user).count(), 3)
+        for post in posts:
+            post.refresh_from_db()
+        self.assertEqual(posts[0].reaction_counts["sad"], 0)
+        self.assertEqual(posts[0].reaction_counts["heart"], 1)
+        self.assertEqual(posts[1].reaction_counts["smile"], 0)
+        self.assertEqual(posts[2].reaction_counts["laugh"], 1)
+
+    def test_reconcile_reaction_counts(self):
+        post = PostFactory()
+        ReactionFactory.create_batch(3, post=post, value=Reaction.Values.SAD)
+        ReactionFactory(post=post, value=None)
+        Post.objects.update(sad_count=0, smile_count=5)
+
+        call_command("reconcile_reaction_counts", stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.sad_count, 3)
+        self.assertEqual(post.smile_count, 0)
+
+
+class ReactionConcurrencyTestCase(TransactionTestCase):
+    def test_concurrent_toggle(self):
+        user = UserFactory()
+        post = PostFactory()
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def toggle():
+            try:
+                barrier.wait()
+                Reaction.objects.toggle(user, post, "smile")
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=toggle) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(errors, [])
+        reaction = Reaction.objects.get(author=user, post=post)
+        self.assertIsNone(reaction.value)
+        post.refresh_from_db()
+        self.assertEqual(post.smile_count, 0)
@@ -0,0 +1,128 @@
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from config.asgi import application
+from general.api.serializers import TokenObtainPairSerializer
+from general.factories import UserFactory, ChatFactory, MessageFactory
+
+
+class ChatWebSocketTestCase(TransactionTestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.companion = UserFactory()
+        self.chat = ChatFactory(user_1=self.user, user_2=self.companion)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.companion)
+        async_to_sync(get_channel_layer().flush)()
+
+    def get_token(self, user):
+        return str(TokenObtainPairSerializer.get_token(user).access_token)
+
+    async def connect(self, user=None, chat=None, query=""):
+        token = self.get_token(user or self.user)
+        communicator = WebsocketCommunicator(
+            application,
+            f"/ws/chats/{(chat or self.chat).pk}/?token={token}{query}",
+            headers=[(b"host", b"localhost"), (b"origin", b"http://localhost")],
+        )
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    @database_sync_to_async
+    def send_message(self, content):
+        response = self.client.post(
+            "/api/messages/",
+            data={"chat": self.chat.pk, "content": content},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    async def test_messages_are_delivered_in_order(self):
+        communicator, connected = await self.connect()
+        self.assertTrue(connected)
+
+        ids = [await self.send_message(f"Сообщение {i}") for i in range(3)]
+        received = [await communicator.receive_json_from() for _ in ids]
+
+        self.assertEqual([message["id"] for message in received], ids)
+        self.assertEqual(received[0]["content"], "Сообщение 0")
+        self.assertEqual(received[0]["message_author"], self.companion.first_name)
+        self.assertEqual(
+            set(received[0]), {"id", "content", "message_author", "created_at"}
+        )
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_author_sees_own_message(self):
+        communicator, _ = await self.connect(user=self.companion)
+        await self.send_message("Привет")
+        message = await communicator.receive_json_from()
+        self.assertEqual(message["message_author"], "Вы")
+        await communicator.disconnect()
+
+    async def test_reconnect_from_cursor(self):
+        communicator, _ = await self.connect()
+        first_id = await self.send_message("До обрыва")
+        self.assertEqual((await communicator.receive_json_from())["id"], first_id)
+        await communicator.disconnect()
+
+        missed = [await self.send_message(f"Пропущено {i}") for i in range(2)]
+
+        communicator, connected = await self.connect(query=f"&after={first_id}")
+        self.assertTrue(connected)
+        replayed = [await communicator.receive_json_from() for _ in missed]
+        self.assertEqual([message["id"] for message in replayed], missed)
+
+        new_id = await self.send_message("После переподключения")
+        self.assertEqual((await communicator.receive_json_from())["id"], new_id)
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    @override_settings(MESSAGES_WAIT_LIMIT=3)
+    async def test_replay_is_limited(self):
+        ids = [await self.send_message(f"Сообщение {i}") for i in range(5)]
+
+        communicator, _ = await self.connect(query="&after=0")
+        history = (await communicator.receive_json_from())["history"]
+        replayed = [await communicator.receive_json_from() for _ in range(3)]
+        self.assertEqual([message["id"] for message in replayed], ids[2:])
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+        response = await database_sync_to_async(self.client.get)(history)
+        self.assertEqual(
+            [message["id"] for message in response.data["results"]], ids[1::-1]
+        )
+
+    async def test_reject_invalid_cursor(self):
+        _, connected = await self.connect(query="&after=abc")
+        self.assertFalse(connected)
+
+    async def test_reject_anonymous(self):
+        communicator = WebsocketCommunicator(
+            application,
+            f"/ws/chats/{self.chat.pk}/",
+            headers=[(b"host", b"localhost"), (b"origin", b"http://localhost")],
+        )
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+        communicator = WebsocketCommunicator(
+            application,
+            f"/ws/chats/{self.chat.pk}/?token=invalid",
+            headers=[(b"host", b"localhost"), (b"origin", b"http://localhost")],
+        )
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_reject_foreign_chat(self):
+        other_chat = await database_sync_to_async(ChatFactory)()
+        await database_sync_to_async(MessageFactory)(chat=other_chat)
+        _, connected = await self.connect(chat=other_chat)
+        self.assertFalse(connected)
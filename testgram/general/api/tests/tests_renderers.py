@@ -0,0 +1,54 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from general.api import renderers
+from general.api.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTestCase(APITestCase):
+    data = {
+        "results": [
+            ReturnDict(
+                {
+                    "id": 1,
+                    "title": "Привет мир",
+                    "created_at": datetime.datetime(2024, 3, 1, 12, 30, 15, 123456),
+                    "date": datetime.date(2024, 3, 1),
+                    "price": Decimal("1.50"),
+                    "message": gettext_lazy("Not found."),
+                    "counts": {1: 2},
+                    "empty": None,
+                    "separator": "a\u2028b",
+                },
+                serializer=None,
+            )
+        ],
+    }
+
+    def test_render_matches_json_renderer(self):
+        self.assertIsNotNone(renderers.orjson)
+        self.assertEqual(
+            FastJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+        )
+
+    def test_render_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+            )
+
+    def test_render_unsupported_by_orjson(self):
+        data = {"big": 2**70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_render_with_indent(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, "application/json; indent=2"),
+            JSONRenderer().render(self.data, "application/json; indent=2"),
+        )
@@ -0,0 +1,81 @@
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from general.db_routers import read_database
+from general.factories import UserFactory, PostFactory
+from general.models import Chat
+
+
+# Зеркало в тестах - отдельное соединение, оно не видит данные
+# незакоммиченной транзакции TestCase.
+@override_settings(DATABASE_REPLICAS=["replica"], FEED_FANOUT_IN_BACKGROUND=False)
+class ReplicaRoutingTestCase(APITransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.url = "/api/posts/"
+
+    def capture(self, alias):
+        return CaptureQueriesContext(connections[alias])
+
+    def test_get_reads_from_replica(self):
+        PostFactory.create_batch(3)
+        self.client.get(self.url, format="json")
+        with self.capture("default") as primary, self.capture("replica") as replica:
+            response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertGreater(len(replica), 0)
+        self.assertEqual(len(primary), 0)
+
+    def test_cache_fill_reads_from_primary(self):
+        post = PostFactory()
+        with self.capture("default") as primary, self.capture("replica") as replica:
+            response = self.client.get(f"{self.url}{post.pk}/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(primary), 1)
+        self.assertIn('"general_post"', primary[0]["sql"])
+        self.assertEqual(len(replica), 1)
+        self.assertIn('"general_reaction"', replica[0]["sql"])
+
+    def test_post_pins_primary(self):
+        with self.capture("replica") as replica:
+            response = self.client.post(
+                self.url, data={"title": "title", "body": "body"}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(replica), 0)
+        self.assertIn("read_primary", response.cookies)
+
+        with self.capture("default") as primary, self.capture("replica") as replica:
+            response = self.client.get(self.url, format="json")
+        self.assertEqual(response.data["results"][0]["title"], "title")
+        self.assertGreater(len(primary), 0)
+        self.assertEqual(len(replica), 0)
+
+    def test_failed_post_does_not_pin_primary(self):
+        response = self.client.post(self.url, data={}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("read_primary", response.cookies)
+
+    def test_get_or_create_pair_writes_to_primary(self):
+        companion = UserFactory()
+        token = read_database.set("replica")
+        try:
+            with self.capture("default") as primary, self.capture("replica") as replica:
+                chat = Chat.objects.get_or_create_pair(self.user, companion)
+        finally:
+            read_database.reset(token)
+        self.assertEqual(chat._state.db, "default")
+        self.assertEqual(len(primary), 1)
+        self.assertEqual(len(replica), 0)
+
+    def test_read_primary_header(self):
+        with self.capture("replica") as replica:
+            self.client.get(self.url, format="json", HTTP_X_READ_PRIMARY="1")
+        self.assertEqual(len(replica), 0)
@@ -1,4 +1,9 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
 from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
 from django.utils.timezone import make_naive
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -42,7 +47,7 @@ class UserTestCase(APITestCase):
         self.user.friends.add(users[-1])
         self.user.save()
 
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(2):
             response = self.client.get(path=self.url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data["results"]), 6)
@@ -51,6 +56,26 @@ class UserTestCase(APITestCase):
         for user_data in response.data["results"][1:]:
             self.assertFalse(user_data["is_friend"])
 
+    def test_user_list_queries_do_not_depend_on_friend_count(self):
+        users = UserFactory.create_batch(3)
+        others = UserFactory.create_batch(30)
+        for user in users:
+            user.friends.add(*others)
+        self.user.friends.add(users[0], *others[10:])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(path=self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                path=f"{self.url}{users[0].pk}/friends/", format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 31)
+        for user_data in response.data["results"]:
+            self.assertTrue(user_data["is_friend"])
+
     def test_user_list_logout(self):
         self.client.logout()
         UserFactory.create_batch(5)
@@ -106,6 +131,77 @@ class UserTestCase(APITestCase):
         self.user.refresh_from_db()
         self.assertTrue(friend in self.user.friends.all())
 
+    def test_user_friend_count(self):
+        friend = UserFactory()
+
+        url = f"{self.url}{friend.pk}/add_friend/"
+        self.client.post(path=url, format="json")
+        self.client.post(path=url, format="json")
+        self.user.refresh_from_db()
+        friend.refresh_from_db()
+        self.assertEqual(self.user.friend_count, 1)
+        self.assertEqual(friend.friend_count, 1)
+
+        other = UserFactory()
+        url = f"{self.url}{other.pk}/remove_friend/"
+        self.client.post(path=url, format="json")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.friend_count, 1)
+
+        url = f"{self.url}{friend.pk}/remove_friend/"
+        self.client.post(path=url, format="json")
+        self.user.refresh_from_db()
+        friend.refresh_from_db()
+        self.assertEqual(self.user.friend_count, 0)
+        self.assertEqual(friend.friend_count, 0)
+
+    def test_user_friend_count_on_clear(self):
+        friends = UserFactory.create_batch(3)
+        self.user.friends.set(friends)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.friend_count, 3)
+
+        self.user.friends.clear()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.friend_count, 0)
+        for friend in friends:
+            friend.refresh_from_db()
+            self.assertEqual(friend.friend_count, 0)
+
+    def test_remove_friend_with_stale_friend_count(self):
+        friend = UserFactory()
+        self.user.friends.add(friend)
+        User.objects.update(friend_count=0)
+
+        response = self.client.post(
+            path=f"{self.url}{friend.pk}/remove_friend/", format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.friend_count, 0)
+        self.assertFalse(self.user.friends.exists())
+
+    def test_friend_count_is_reloaded_after_change(self):
+        friend = UserFactory()
+        user = User.objects.only("pk").get(pk=self.user.pk)
+        user.friends.add(friend)
+        self.assertEqual(user.friend_count, 1)
+        user.friends.remove(friend)
+        self.assertEqual(user.friend_count, 0)
+
+    def test_reconcile_friend_count(self):
+        friends = UserFactory.create_batch(2)
+        self.user.friends.set(friends)
+        User.objects.update(friend_count=7)
+
+        call_command("reconcile_friend_count", stdout=StringIO())
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.friend_count, 2)
+        for friend in friends:
+            friend.refresh_from_db()
+            self.assertEqual(friend.friend_count, 1)
+
     def test_user_add_friends_logout(self):
         self.client.logout()
         friend = UserFactory()
@@ -168,7 +264,10 @@ class UserTestCase(APITestCase):
         # other posts
         PostFactory.create_batch(10)
 
-        response = self.client.get(path=f"{self.url}{target_user.pk}/", format="json")
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                path=f"{self.url}{target_user.pk}/", format="json"
+            )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         expected_data = {
             "id": target_user.pk,
@@ -177,28 +276,64 @@ class UserTestCase(APITestCase):
             "email": target_user.email,
             "is_friend": True,
             "friend_count": 2,
+            "posts_count": 2,
             "posts": [
                 {
-                    "id": post_1.pk,
-                    "title": post_1.title,
-                    "body": post_1.body,
-                    "created_at": make_naive(post_1.created_at).strftime(
-                        "%Y-%m-%dT%H:%M:%S"
+                    "id": post.pk,
+                    "title": post.title,
+                    "body": (
+                        post.body[:125] + "..." if len(post.body) > 128 else post.body
                     ),
-                },
-                {
-                    "id": post_2.pk,
-                    "title": post_2.title,
-                    "body": post_2.body,
-                    "created_at": make_naive(post_2.created_at).strftime(
+                    "created_at": make_naive(post.created_at).strftime(
                         "%Y-%m-%dT%H:%M:%S"
                     ),
-                },
+                }
+                for post in (post_2, post_1)
             ],
+            "posts_url": f"http://testserver{self.url}{target_user.pk}/posts/",
         }
 
         self.assertEqual(expected_data, response.data)
 
+    def test_retrieve_user_with_many_posts(self):
+        target_user = UserFactory()
+        posts = PostFactory.create_batch(8, author=target_user, body="a" * 200)
+        posts.reverse()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                path=f"{self.url}{target_user.pk}/", format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["posts_count"], 8)
+        self.assertListEqual(
+            [post["id"] for post in response.data["posts"]],
+            [post.pk for post in posts[:5]],
+        )
+        self.assertEqual(response.data["posts"][0]["body"], "a" * 125 + "...")
+
+    def test_get_user_posts(self):
+        target_user = UserFactory()
+        posts = PostFactory.create_batch(15, author=target_user)
+        posts.reverse()
+        PostFactory.create_batch(5)
+
+        url = f"{self.url}{target_user.pk}/posts/"
+        with self.assertNumQueries(2):
+            response = self.client.get(path=url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]],
+            [post.pk for post in posts[:10]],
+        )
+
+        response = self.client.get(path=response.data["next"], format="json")
+        self.assertListEqual(
+            [post["id"] for post in response.data["results"]],
+            [post.pk for post in posts[10:]],
+        )
+        self.assertIsNone(response.data["next"])
+
     def test_retrieve_user_logout(self):
         target_user = UserFactory()
         self.client.logout()
@@ -280,24 +415,21 @@ class UserTestCase(APITestCase):
             "email": target_user.email,
             "is_friend": False,
             "friend_count": 2,
+            "posts_count": 2,
             "posts": [
                 {
-                    "id": post_1.pk,
-                    "title": post_1.title,
-                    "body": post_1.body,
-                    "created_at": make_naive(post_1.created_at).strftime(
-                        "%Y-%m-%dT%H:%M:%S"
+                    "id": post.pk,
+                    "title": post.title,
+                    "body": (
+                        post.body[:125] + "..." if len(post.body) > 128 else post.body
                     ),
-                },
-                {
-                    "id": post_2.pk,
-                    "title": post_2.title,
-                    "body": post_2.body,
-                    "created_at": make_naive(post_2.created_at).strftime(
+                    "created_at": make_naive(post.created_at).strftime(
                         "%Y-%m-%dT%H:%M:%S"
                     ),
-                },
+                }
+                for post in (post_2, post_1)
             ],
+            "posts_url": f"http://testserver{self.url}{target_user.pk}/posts/",
         }
 
         self.assertDictEqual(response.data, expected_data)
@@ -306,3 +438,16 @@ class UserTestCase(APITestCase):
         self.client.logout()
         response = self.client.get(path=f"{self.url}me/", format="json")
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_admin_save_keeps_friend_count(self):
+        user = UserFactory()
+        stale_user = User.objects.get(pk=user.pk)
+        user.friends.add(UserFactory())
+
+        stale_user.first_name = "Новое имя"
+        form = mock.Mock(changed_data=["first_name", "friends"])
+        admin.site._registry[User].save_model(None, stale_user, form, change=True)
+
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, "Новое имя")
+        self.assertEqual(user.friend_count, 1)
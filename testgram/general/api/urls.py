@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import routers
 
 from general.api.views import (
@@ -7,6 +8,9 @@ from general.api.views import (
     ReactionsViewSet,
     ChatViewSet,
     MessageViewSet,
+    AsyncChatViewSet,
+    AsyncMessageViewSet,
+    FeedViewSet,
 )
 
 router = routers.SimpleRouter()
@@ -14,6 +18,11 @@ router.register(r"comments", CommentsViewSet, basename="comments")
 router.register(r"posts", PostViewSet, basename="posts")
 router.register(r"users", UserViewSet, basename="users")
 router.register(r"reactions", ReactionsViewSet, basename="reactions")
-router.register(r"chats", ChatViewSet, basename="chats")
-router.register(r"messages", MessageViewSet, basename="messages")
+if settings.ASYNC_CHAT_VIEWS:
+    router.register(r"chats", AsyncChatViewSet, basename="chats")
+    router.register(r"messages", AsyncMessageViewSet, basename="messages")
+else:
+    router.register(r"chats", ChatViewSet, basename="chats")
+    router.register(r"messages", MessageViewSet, basename="messages")
+router.register(r"feed", FeedViewSet, basename="feed")
 urlpatterns = router.urls
@@ -1,15 +1,53 @@
-from django.db.models import CharField, Case, When, Value, F, OuterRef, Q, Subquery
+import asyncio
+
+from adrf import viewsets as async_viewsets
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections, router, transaction
+from django.db.models import (
+    CharField,
+    Case,
+    When,
+    Value,
+    F,
+    Q,
+    Count,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
+from django.db.models.functions import Coalesce, Greatest
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import APIException, NotFound, PermissionDenied
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from general.api.cache import get_post_fragments, invalidate_posts
+from general.api.fast import (
+    UserListValuesSerializer,
+    PostListValuesSerializer,
+    ChatListValuesSerializer,
+    MessageListValuesSerializer,
+)
+from general.api.pagination import (
+    ApproximateCountPagination,
+    AsyncPageNumberPagination,
+    AsyncKeysetPagination,
+    KeysetPagination,
+    FeedPagination,
+    CommentPagination,
+    OrderedUnion,
+)
+from general.api.renderers import StreamingJSONResponse
 from general.api.serializers import (
     UserRegistrationSerializer,
     UserListSerializer,
     UserRetrieveSerializer,
+    NestedPostListSerializer,
     PostRetrieveSerializer,
     PostCreateSerializer,
     PostListSerializer,
@@ -19,8 +57,11 @@ from general.api.serializers import (
     MessageListSerializer,
     ChatListSerializer,
     MessageSerializer,
+    MessageWaitSerializer,
 )
-from general.models import User, Post, Comment, Message, Chat
+from general.feed import get_feed_querysets
+from general.models import User, Post, Comment, Message, Chat, Reaction
+from general.realtime import message_notifier
 
 
 class UserViewSet(
@@ -29,10 +70,44 @@ class UserViewSet(
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
 ):
+    pagination_class = ApproximateCountPagination
+    profile_posts_limit = 5
+
     def get_queryset(self):
-        queryset = User.objects.all().prefetch_related("friends").order_by("-id")
+        friendship = User.friends.through.objects.filter(
+            from_user=OuterRef("pk"),
+            to_user=self.request.user.pk,
+        )
+        queryset = (
+            User.objects.all().annotate(is_friend=Exists(friendship)).order_by("-id")
+        )
+        if self.action in ("retrieve", "me"):
+            posts_count = (
+                Post.objects.filter(author=OuterRef("pk"))
+                .order_by()
+                .values("author")
+                .annotate(count=Count("*"))
+                .values("count")
+            )
+            recent_posts = Post.objects.order_by("-created_at", "-id")[
+                : self.profile_posts_limit
+            ]
+            queryset = queryset.annotate(
+                posts_count=Coalesce(Subquery(posts_count), 0)
+            ).prefetch_related(
+                Prefetch("posts", queryset=recent_posts, to_attr="recent_posts")
+            )
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        serializer = UserListValuesSerializer(self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(serializer.get_queryset(queryset))
+        return self.get_paginated_response(serializer.serialize(page))
+
     @action(detail=True, methods=["get"])
     def friends(self, request, pk=None):
         user = self.get_object()
@@ -42,9 +117,16 @@ class UserViewSet(
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
+    @action(detail=True, methods=["get"], pagination_class=KeysetPagination)
+    def posts(self, request, pk=None):
+        user = self.get_object()
+        page = self.paginate_queryset(Post.objects.filter(author=user))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=["get"])
     def me(self, request):
-        instance = self.request.user
+        instance = self.get_queryset().get(pk=request.user.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -65,6 +147,8 @@ class UserViewSet(
             return UserRegistrationSerializer
         elif self.action in ("retrieve", "me"):
             return UserRetrieveSerializer
+        elif self.action == "posts":
+            return NestedPostListSerializer
         return UserListSerializer
 
     def get_permissions(self):
@@ -75,11 +159,30 @@ class UserViewSet(
         return super().get_permissions()
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class MyReactionsMixin:
+    def get_my_reactions(self, posts):
+        if not posts:
+            return {}
+        return dict(
+            Reaction.objects.filter(
+                author=self.request.user, post__in=posts
+            ).values_list("post", "value")
+        )
+
+    def get_post_serializer(self, posts, **kwargs):
+        context = self.get_serializer_context()
+        context["my_reactions"] = self.get_my_reactions(
+            posts if kwargs.get("many") else [posts]
+        )
+        return self.get_serializer(posts, context=context, **kwargs)
+
+
+class PostViewSet(MyReactionsMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = ApproximateCountPagination
 
     def get_queryset(self):
-        if self.action in ("list"):
+        if self.action in ("list", "retrieve"):
             queryset = Post.objects.all().select_related("author").order_by("-id")
         else:
             queryset = Post.objects.all().order_by("-id")
@@ -93,6 +196,52 @@ class PostViewSet(viewsets.ModelViewSet):
         else:
             return PostCreateSerializer
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset.values_list("pk", flat=True))
+        if page is not None:
+            return self.get_paginated_response(self.get_cached_posts(list(page)))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            post_id = int(self.kwargs[self.lookup_field])
+        except ValueError:
+            raise NotFound
+        data = self.get_cached_posts([post_id])
+        if not data:
+            raise NotFound
+        return Response(data[0])
+
+    def get_cached_posts(self, post_ids):
+        # В кеше лежат данные без my_reaction, реакции пользователя
+        # подставляются при каждом запросе.
+        fragments = get_post_fragments(post_ids, self.action, self.load_posts)
+        my_reactions = self.get_my_reactions(post_ids)
+        data = []
+        for post_id in post_ids:
+            if post_id in fragments:
+                post = dict(fragments[post_id])
+                post["my_reaction"] = my_reactions.get(post_id, "")
+                data.append(post)
+        return data
+
+    def load_posts(self, post_ids):
+        # Фрагменты строятся с основной базы: отстающая реплика сохранила бы
+        # в кеш старые данные под уже новой версией поста.
+        posts = (
+            self.filter_queryset(self.get_queryset())
+            .filter(pk__in=post_ids)
+            .using(router.db_for_write(Post))
+        )
+        context = {**self.get_serializer_context(), "my_reactions": {}}
+        if self.action == "list" and settings.FAST_READ_SERIALIZERS:
+            serializer = PostListValuesSerializer(context)
+            data = serializer.serialize(serializer.get_queryset(posts))
+        else:
+            data = self.get_serializer(posts, many=True, context=context).data
+        return {post["id"]: post for post in data}
+
     def perform_update(self, serializer):
         instance = self.get_object()
 
@@ -106,22 +255,54 @@ class PostViewSet(viewsets.ModelViewSet):
         instance.delete()
 
 
+class FeedViewSet(MyReactionsMixin, viewsets.GenericViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = PostListSerializer
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        return get_feed_querysets(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_post_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
 class CommentsViewSet(
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Comment.objects.all().order_by("-id")
+    queryset = Comment.objects.all().select_related("author").order_by("-id")
     permission_classes = [IsAuthenticated]
+    pagination_class = CommentPagination
     serializer_class = CommentSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["post__id"]
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            comment = serializer.save()
+            Post.objects.filter(pk=comment.post_id).update(
+                comment_count=F("comment_count") + 1
+            )
+        invalidate_posts([comment.post_id])
+
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
             raise PermissionDenied("Вы не являетесь автором этого комментария.")
-        instance.delete()
+        with transaction.atomic():
+            # Параллельный DELETE того же комментария уже мог удалить строку
+            # и уменьшить счетчик.
+            deleted, _ = instance.delete()
+            if not deleted:
+                return
+            Post.objects.filter(pk=instance.post_id).update(
+                comment_count=Greatest(F("comment_count") - 1, 0)
+            )
+        invalidate_posts([instance.post_id])
 
 
 class ReactionsViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
@@ -136,19 +317,25 @@ class ChatViewSet(
     viewsets.GenericViewSet,
 ):
     permission_classes = [IsAuthenticated]
+    list_ordering = ("-last_message_datetime", "-id")
 
     def get_serializer_class(self):
         if self.action == "list":
             return ChatListSerializer
-        elif self.action == "messages":
+        elif self.action in ("messages", "wait_messages"):
             return MessageListSerializer
         return ChatSerializer
 
     def list(self, request, *args, **kwargs):
-        empty = request.query_params.get("empty")
-        queryset = self.filter_queryset(self.get_queryset(empty))
+        querysets = self.get_list_querysets(request.query_params.get("empty"))
 
-        page = self.paginate_queryset(queryset)
+        if settings.FAST_READ_SERIALIZERS:
+            serializer = ChatListValuesSerializer(self.get_serializer_context())
+            querysets = [serializer.get_queryset(qs) for qs in querysets]
+            page = self.paginate_queryset(OrderedUnion(querysets, self.list_ordering))
+            return self.get_paginated_response(serializer.serialize(page))
+
+        page = self.paginate_queryset(OrderedUnion(querysets, self.list_ordering))
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
@@ -157,57 +344,58 @@ class ChatViewSet(
         user = self.request.user
         query_param = {}
         if empty is not None:
-            query_param["messages__isnull"] = bool(int(empty))
-
-        last_message_subquery = (
-            Message.objects.filter(chat=OuterRef("pk"))
-            .order_by("-created_at")
-            .values("created_at")[:1]
-        )
-        last_message_content_subquery = (
-            Message.objects.filter(chat=OuterRef("pk"))
-            .order_by("-created_at")
-            .values("content")[:1]
-        )
-        last_message_author_subquery = (
-            Message.objects.filter(chat=OuterRef("pk"))
-            .order_by("-created_at")
-            .values("author")[:1]
-        )
+            query_param["last_message__isnull"] = bool(int(empty))
 
         qs = (
             Chat.objects.filter(Q(user_1=user) | Q(user_2=user), **query_param)
-            .annotate(
-                last_message_datetime=Subquery(last_message_subquery),
-                last_message_content=Subquery(last_message_content_subquery),
-                last_message_author=Subquery(last_message_author_subquery),
-            )
             .select_related(
                 "user_1",
                 "user_2",
             )
-            .order_by("-last_message_datetime")
-            .distinct()
+            .order_by(*self.list_ordering)
         )
 
         return qs
 
-    @action(detail=True, methods=["get"])
-    def messages(self, request, pk=None):
-        messages = (
-            self.get_object()
-            .messages.filter(chat__id=pk)
-            .annotate(
-                message_author=Case(
-                    When(author=self.request.user, then=Value("Вы")),
-                    default=F("author__first_name"),
-                    output_field=CharField(),
-                )
+    def get_list_querysets(self, empty: str | None = None):
+        # Условие user_1 OR user_2 не читается индексами (user_N, ...) по порядку,
+        # поэтому список строится как OrderedUnion двух выборок, по одной на индекс.
+        user = self.request.user
+        queryset = self.filter_queryset(self.get_queryset(empty))
+        return [
+            queryset.filter(user_1=user),
+            queryset.filter(user_2=user).exclude(user_1=user),
+        ]
+
+    def get_messages(self, chat):
+        return chat.messages.annotate(
+            message_author=Case(
+                When(author=self.request.user, then=Value("Вы")),
+                default=F("author__first_name"),
+                output_field=CharField(),
             )
-            .order_by("-created_at")
         )
-        serializer = self.get_serializer(messages, many=True)
-        return Response(serializer.data)
+
+    @action(detail=True, methods=["get"], pagination_class=KeysetPagination)
+    def messages(self, request, pk=None):
+        messages = self.get_messages(self.get_object())
+        if settings.FAST_READ_SERIALIZERS:
+            serializer = MessageListValuesSerializer(self.get_serializer_context())
+            page = self.paginate_queryset(serializer.get_queryset(messages))
+            return self.get_paginated_response(serializer.serialize(page))
+
+        page = self.paginate_queryset(messages)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"], url_path="messages/export")
+    def export_messages(self, request, pk=None):
+        serializer = MessageListValuesSerializer(self.get_serializer_context())
+        messages = serializer.get_queryset(
+            self.get_messages(self.get_object()).order_by("created_at", "id")
+        )
+        rows = messages.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        return StreamingJSONResponse(serializer.to_representation(row) for row in rows)
 
 
 class MessageViewSet(
@@ -222,4 +410,118 @@ class MessageViewSet(
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
             raise PermissionDenied("Вы не являетесь автором этого сообщения.")
-        instance.delete()
+        with transaction.atomic():
+            chat = Chat.objects.select_for_update().get(pk=instance.chat_id)
+            is_last_message = chat.last_message_id == instance.pk
+            instance.delete()
+            if is_last_message:
+                chat.refresh_last_message()
+
+
+class ASGIRequired(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "Доступно только при запуске через ASGI (config.asgi)."
+    default_code = "asgi_required"
+
+
+def release_connections():
+    # Ожидающий запрос не держит соединения с базой.
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+class AsyncChatViewSet(async_viewsets.GenericViewSet, ChatViewSet):
+    """
+    ChatViewSet с async-версиями списка чатов и истории сообщений.
+
+    Ответ строится из QuerySet.values(), которые читаются через async ORM:
+    сериализаторы моделей обращались бы к связанным объектам синхронно.
+    """
+
+    pagination_class = AsyncPageNumberPagination
+
+    async def list(self, request, *args, **kwargs):
+        serializer = ChatListValuesSerializer(self.get_serializer_context())
+        querysets = [
+            serializer.get_queryset(qs)
+            for qs in self.get_list_querysets(request.query_params.get("empty"))
+        ]
+        page = await self.apaginate_queryset(
+            OrderedUnion(querysets, self.list_ordering)
+        )
+        return self.get_paginated_response(serializer.serialize(page))
+
+    @action(detail=True, methods=["get"], pagination_class=AsyncKeysetPagination)
+    async def messages(self, request, pk=None):
+        messages = self.get_messages(await self.aget_object())
+        serializer = MessageListValuesSerializer(self.get_serializer_context())
+        page = await self.apaginate_queryset(serializer.get_queryset(messages))
+        return self.get_paginated_response(serializer.serialize(page))
+
+    @action(detail=True, methods=["get"], url_path="messages/wait")
+    async def wait_messages(self, request, pk=None):
+        """
+        Сообщения новее `after`, в порядке отправки.
+
+        Если таких нет, запрос ждет их до `timeout` секунд и при отсутствии
+        возвращает пустой список.
+        """
+        # Под WSGI ожидание заняло бы поток воркера на все время таймаута.
+        if not isinstance(request._request, ASGIRequest):
+            raise ASGIRequired()
+
+        params = MessageWaitSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        chat = await self.aget_object()
+
+        serializer = MessageListValuesSerializer(self.get_serializer_context())
+        # Уведомление приходит после коммита на основной базе,
+        # реплика в этот момент может еще не содержать сообщения.
+        messages = serializer.get_queryset(
+            self.get_messages(chat)
+            .using(router.db_for_write(Message))
+            .filter(id__gt=params.validated_data["after"])
+            .order_by("id")
+        )[: settings.MESSAGES_WAIT_LIMIT]
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + params.validated_data["timeout"]
+        async with message_notifier.subscribe(chat.pk) as new_message:
+            while True:
+                # Событие сбрасывается до запроса, чтобы не пропустить
+                # сообщение, отправленное между запросом и ожиданием.
+                new_message.clear()
+                rows = [row async for row in messages.aiterator()]
+                timeout = deadline - loop.time()
+                if rows or timeout <= 0:
+                    break
+                await sync_to_async(release_connections)()
+                try:
+                    await asyncio.wait_for(new_message.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        return Response({"results": serializer.serialize(rows)})
+
+    @action(detail=True, methods=["get"], url_path="messages/export")
+    async def export_messages(self, request, pk=None):
+        serializer = MessageListValuesSerializer(self.get_serializer_context())
+        messages = serializer.get_queryset(
+            self.get_messages(await self.aget_object()).order_by("created_at", "id")
+        )
+        rows = messages.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        return StreamingJSONResponse(
+            serializer.to_representation(row) async for row in rows
+        )
+
+
+class AsyncMessageViewSet(async_viewsets.GenericViewSet, MessageViewSet):
+    async def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        # Поле chat проверяется синхронным запросом к базе.
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        serializer.instance = await serializer.acreate(serializer.validated_data)
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        )
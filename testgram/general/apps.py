@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GeneralConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "general"
+
+    def ready(self):
+        from general import signals  # noqa: F401
+        from general.api import schema  # noqa: F401
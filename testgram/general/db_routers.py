@@ -0,0 +1,30 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Алиас базы для чтения в текущем запросе; None - читать с основной.
+read_database = ContextVar("read_database", default=None)
+
+
+def choose_replica():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class PrimaryReplicaRouter:
+    """
+    Чтение с реплики, если ReplicaMiddleware разрешил это для запроса,
+    запись и все остальное - в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_database.get() or "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -1,4 +1,5 @@
 import factory
+from django.db.models import F
 from factory.django import DjangoModelFactory
 from general.models import User, Post, Comment, Reaction, Chat, Message
 
@@ -31,6 +32,13 @@ class CommentFactory(DjangoModelFactory):
     post = factory.SubFactory(PostFactory)
     body = factory.Faker("text")
 
+    @factory.post_generation
+    def comment_count(obj, create, extracted, **kwargs):
+        if create:
+            Post.objects.filter(pk=obj.post_id).update(
+                comment_count=F("comment_count") + 1
+            )
+
 
 class ReactionFactory(DjangoModelFactory):
     class Meta:
@@ -40,6 +48,11 @@ class ReactionFactory(DjangoModelFactory):
     post = factory.SubFactory(PostFactory)
     value = Reaction.Values.SMILE
 
+    @factory.post_generation
+    def reaction_count(obj, create, extracted, **kwargs):
+        if create:
+            obj.post.change_reaction_count(None, obj.value)
+
 
 class ChatFactory(DjangoModelFactory):
     class Meta:
@@ -56,3 +69,8 @@ class MessageFactory(DjangoModelFactory):
     content = factory.Faker("text")
     author = factory.SubFactory(UserFactory)
     chat = factory.LazyAttribute(lambda obj: ChatFactory(user_1=obj.author))
+
+    @factory.post_generation
+    def last_message(obj, create, extracted, **kwargs):
+        if create:
+            obj.chat.push_last_message(obj)
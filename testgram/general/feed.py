@@ -0,0 +1,135 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+from general.models import Post, TimelineEntry, User
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.FEED_FANOUT_WORKERS,
+    thread_name_prefix="feed-fanout",
+)
+
+
+def should_fan_out(author):
+    # Посты авторов с большим числом друзей не раскладываются по лентам,
+    # а подмешиваются при чтении в get_feed_querysets.
+    return author.friend_count <= settings.FEED_FANOUT_MAX_FRIENDS
+
+
+def schedule_fan_out(post):
+    if not post.in_timelines:
+        return
+    transaction.on_commit(lambda: _submit(fan_out_post, post.pk))
+
+
+def schedule_backfill(user_id, friend_ids):
+    friend_ids = list(friend_ids)
+    transaction.on_commit(lambda: _submit(backfill_timelines, user_id, friend_ids))
+
+
+def _submit(func, *args):
+    if settings.FEED_FANOUT_IN_BACKGROUND:
+        _executor.submit(_run_in_background, func, *args)
+    else:
+        func(*args)
+
+
+def _run_in_background(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Feed task %s%r failed", func.__name__, args)
+    finally:
+        connections.close_all()
+
+
+def _bulk_create_entries(entries):
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == batch_size:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post_id):
+    post = Post.objects.select_related("author").filter(pk=post_id).first()
+    if post is None:
+        return
+
+    friend_ids = post.author.friends.values_list("id", flat=True)
+    _bulk_create_entries(
+        TimelineEntry(user_id=friend_id, post_id=post.pk, created_at=post.created_at)
+        for friend_id in friend_ids.iterator(chunk_size=settings.FEED_FANOUT_BATCH_SIZE)
+    )
+
+
+def _recent_timeline_posts(author_id):
+    return list(
+        Post.objects.filter(author=author_id, in_timelines=True)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[: settings.FEED_BACKFILL_POSTS]
+    )
+
+
+def backfill_timelines(user_id, friend_ids):
+    """
+    Добавляет последние разложенные посты новых друзей в ленту пользователя
+    и его посты в ленты друзей.
+    """
+    # Дружба могла быть разорвана до запуска задачи.
+    friend_ids = list(
+        User.friends.through.objects.filter(
+            from_user=user_id, to_user__in=friend_ids
+        ).values_list("to_user", flat=True)
+    )
+    if not friend_ids:
+        return
+
+    user_posts = _recent_timeline_posts(user_id)
+    entries = [
+        TimelineEntry(user_id=friend_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in user_posts
+        for friend_id in friend_ids
+    ]
+    for friend_id in friend_ids:
+        entries.extend(
+            TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+            for post_id, created_at in _recent_timeline_posts(friend_id)
+        )
+    _bulk_create_entries(entries)
+
+
+def remove_from_timelines(user_id, friend_ids):
+    TimelineEntry.objects.filter(user=user_id, post__author__in=friend_ids).delete()
+    TimelineEntry.objects.filter(user__in=friend_ids, post__author=user_id).delete()
+
+
+def get_feed_querysets(user):
+    timeline_posts = (
+        Post.objects.filter(timeline_entries__user=user)
+        .annotate(
+            feed_created_at=F("timeline_entries__created_at"),
+            feed_id=F("timeline_entries__post"),
+        )
+        .select_related("author")
+    )
+    # Неразложенные посты читаются по частичному индексу post_not_in_timelines_idx.
+    merged_posts = (
+        Post.objects.filter(
+            author__in=User.friends.through.objects.filter(from_user=user).values(
+                "to_user"
+            ),
+            in_timelines=False,
+        )
+        .annotate(feed_created_at=F("created_at"), feed_id=F("id"))
+        .select_related("author")
+    )
+    return [timeline_posts, merged_posts]
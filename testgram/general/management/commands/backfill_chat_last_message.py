@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, OuterRef, Subquery
+
+from general.models import Chat, Message
+
+
+class Command(BaseCommand):
+    help = "Заполняет данные последнего сообщения у чатов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_message = Message.objects.filter(chat=OuterRef("pk")).order_by(
+            "-created_at", "-id"
+        )
+        max_id = Chat.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+        updated = 0
+        for start in range(0, max_id, batch_size):
+            updated += Chat.objects.filter(
+                id__gt=start, id__lte=start + batch_size
+            ).update(
+                last_message=Subquery(last_message.values("id")[:1]),
+                last_message_content=Subquery(last_message.values("content")[:1]),
+                last_message_author=Subquery(last_message.values("author")[:1]),
+                last_message_datetime=Subquery(last_message.values("created_at")[:1]),
+            )
+
+        self.stdout.write(f"Updated chats: {updated}")
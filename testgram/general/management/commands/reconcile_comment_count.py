@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from general.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает количество комментариев у постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        comment_count = Coalesce(
+            Subquery(
+                Comment.objects.filter(post=OuterRef("pk"))
+                .order_by()
+                .values("post")
+                .annotate(count=Count("*"))
+                .values("count")
+            ),
+            0,
+        )
+        max_id = Post.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+        updated = 0
+        for start in range(0, max_id, batch_size):
+            updated += (
+                Post.objects.filter(id__gt=start, id__lte=start + batch_size)
+                .alias(actual_comment_count=comment_count)
+                .exclude(comment_count=F("actual_comment_count"))
+                .update(comment_count=comment_count)
+            )
+
+        self.stdout.write(f"Updated posts: {updated}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from general.models import User
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает количество друзей у пользователей."
+
+    def handle(self, *args, **options):
+        friend_count = Coalesce(
+            Subquery(
+                User.friends.through.objects.filter(from_user=OuterRef("pk"))
+                .order_by()
+                .values("from_user")
+                .annotate(count=Count("*"))
+                .values("count")
+            ),
+            0,
+        )
+        updated = (
+            User.objects.alias(actual_friend_count=friend_count)
+            .exclude(friend_count=F("actual_friend_count"))
+            .update(friend_count=friend_count)
+        )
+
+        self.stdout.write(f"Updated users: {updated}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from general.models import Post, Reaction
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики реакций у постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        counters = {}
+        for value in Reaction.Values.values:
+            reaction_count = (
+                Reaction.objects.filter(post=OuterRef("pk"), value=value)
+                .order_by()
+                .values("post")
+                .annotate(count=Count("*"))
+                .values("count")
+            )
+            counters[f"{value}_count"] = Coalesce(Subquery(reaction_count), 0)
+        max_id = Post.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+        updated = 0
+        for start in range(0, max_id, batch_size):
+            updated += Post.objects.filter(
+                id__gt=start, id__lte=start + batch_size
+            ).update(**counters)
+
+        self.stdout.write(f"Updated posts: {updated}")
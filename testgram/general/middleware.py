@@ -0,0 +1,69 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from general.db_routers import choose_replica, read_database
+
+
+class ReplicaMiddleware:
+    """
+    Направляет чтения безопасных запросов на реплику.
+
+    После успешного изменяющего запроса клиент на REPLICA_PIN_SECONDS
+    получает cookie, и его запросы читают с основной базы, чтобы
+    он увидел свои изменения несмотря на отставание реплики.
+    Клиенты без cookie могут передать заголовок X-Read-Primary: 1.
+    """
+
+    pin_cookie_name = "read_primary"
+    pin_header_name = "HTTP_X_READ_PRIMARY"
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = read_database.set(self.get_read_database(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = read_database.set(self.get_read_database(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                self.pin_cookie_name,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def get_read_database(self, request):
+        return choose_replica() if self.use_replica(request) else None
+
+    def use_replica(self, request):
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in ("GET", "HEAD", "OPTIONS")
+            and self.pin_cookie_name not in request.COOKIES
+            and request.META.get(self.pin_header_name) != "1"
+        )
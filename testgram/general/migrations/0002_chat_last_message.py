@@ -0,0 +1,61 @@
+# Generated by Django 5.0.3 on 2026-10-16 23:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="general.message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chat",
+            name="last_message_author",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="chat",
+            name="last_message_content",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="chat",
+            name="last_message_datetime",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["user_1", "-last_message_datetime"],
+                name="chat_user_1_last_message_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["user_2", "-last_message_datetime"],
+                name="chat_user_2_last_message_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-16 23:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0002_chat_last_message"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["chat", "created_at", "id"], name="message_chat_created_at_idx"
+            ),
+        ),
+    ]
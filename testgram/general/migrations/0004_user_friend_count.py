@@ -0,0 +1,39 @@
+# Generated by Django 5.0.3 on 2026-10-16 23:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_friend_count(apps, schema_editor):
+    # Тот же пересчет, что в команде reconcile_friend_count: без него
+    # удаление существующей дружбы уводило бы счетчик ниже нуля.
+    User = apps.get_model("general", "User")
+    User.objects.update(
+        friend_count=Coalesce(
+            Subquery(
+                User.friends.through.objects.filter(from_user=OuterRef("pk"))
+                .order_by()
+                .values("from_user")
+                .annotate(count=Count("*"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0003_message_chat_created_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="friend_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_friend_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-16 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0004_user_friend_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "created_at", "id"], name="post_author_created_at_idx"
+            ),
+        ),
+    ]
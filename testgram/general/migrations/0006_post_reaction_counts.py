@@ -0,0 +1,38 @@
+# Generated by Django 5.0.3 on 2026-10-16 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0005_post_author_created_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="heart_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="laugh_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="sad_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="smile_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="thumb_up_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-16 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0007_timeline_entry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "id"], name="comment_post_id_idx"),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.3 on 2026-10-17 00:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def mark_posts_in_timelines(apps, schema_editor):
+    # Раньше посты подмешивались при чтении по текущему числу друзей автора,
+    # разметка повторяет это правило, чтобы ленты не изменились. Друзья
+    # считаются по связям: в базах, где 0004 применена без пересчета,
+    # friend_count может быть неверным.
+    Post = apps.get_model("general", "Post")
+    User = apps.get_model("general", "User")
+    friend_count = Coalesce(
+        Subquery(
+            User.friends.through.objects.filter(from_user=OuterRef("pk"))
+            .order_by()
+            .values("from_user")
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+    authors = User.objects.alias(actual_friend_count=friend_count).filter(
+        actual_friend_count__lte=settings.FEED_FANOUT_MAX_FRIENDS
+    )
+    Post.objects.filter(author__in=authors).update(in_timelines=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0009_post_comment_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="in_timelines",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_posts_in_timelines, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("in_timelines", False)),
+                fields=["author", "created_at", "id"],
+                name="post_not_in_timelines_idx",
+            ),
+        ),
+    ]
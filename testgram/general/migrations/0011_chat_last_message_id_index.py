@@ -0,0 +1,35 @@
+# Generated by Django 5.0.3 on 2026-10-17 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("general", "0010_post_in_timelines"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="chat",
+            name="chat_user_1_last_message_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="chat",
+            name="chat_user_2_last_message_idx",
+        ),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["user_1", "-last_message_datetime", "-id"],
+                name="chat_user_1_last_message_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["user_2", "-last_message_datetime", "-id"],
+                name="chat_user_2_last_message_idx",
+            ),
+        ),
+    ]
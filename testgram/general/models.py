@@ -1,6 +1,6 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
-from django.db.models import F, functions
+from django.db import connections, models, router
+from django.db.models import F, Q, functions
 from rest_framework.authtoken.models import Token
 
 
@@ -10,6 +10,7 @@ class User(AbstractUser):
         symmetrical=True,
         blank=True,
     )
+    friend_count = models.PositiveIntegerField(default=0)
 
 
 class Post(models.Model):
@@ -20,6 +21,71 @@ class Post(models.Model):
         auto_now_add=True,
     )
     updated_at = models.DateTimeField(auto_now=True)
+    # Счетчики реакций, по одному на каждое значение Reaction.Values.
+    smile_count = models.PositiveIntegerField(default=0)
+    thumb_up_count = models.PositiveIntegerField(default=0)
+    laugh_count = models.PositiveIntegerField(default=0)
+    sad_count = models.PositiveIntegerField(default=0)
+    heart_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Решение о раскладке принимается при публикации: разложенные посты
+    # читаются из TimelineEntry, остальные подмешиваются в ленту при чтении.
+    in_timelines = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["author", "created_at", "id"],
+                name="post_author_created_at_idx",
+            ),
+            models.Index(
+                fields=["author", "created_at", "id"],
+                condition=Q(in_timelines=False),
+                name="post_not_in_timelines_idx",
+            ),
+        ]
+
+    @property
+    def reaction_counts(self):
+        return {
+            value: getattr(self, f"{value}_count") for value in Reaction.Values.values
+        }
+
+    def change_reaction_count(self, old_value, new_value):
+        if old_value == new_value:
+            return
+        counters = {}
+        if old_value:
+            field = f"{old_value}_count"
+            counters[field] = functions.Greatest(F(field) - 1, 0)
+        if new_value:
+            field = f"{new_value}_count"
+            counters[field] = F(field) + 1
+        Post.objects.filter(pk=self.pk).update(**counters)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="timeline")
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    # Копия Post.created_at, чтобы лента читалась по одному индексу.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                "user",
+                "post",
+                name="timeline_user_post_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "post"],
+                name="timeline_user_created_at_idx",
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -29,6 +95,106 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "id"], name="comment_post_id_idx"),
+        ]
+
+
+class ReactionManager(models.Manager):
+    # Переключение реакций одним запросом: блокировка существующих строк,
+    # обновление с переключением в NULL, вставка новых и пересчет счетчиков поста.
+    toggle_sql = """
+        WITH requested AS (
+            SELECT * FROM unnest(%(post_ids)s::bigint[], %(values)s::varchar[])
+                AS t(post_id, value)
+        ), existing AS (
+            SELECT reaction.id, reaction.post_id, reaction.value
+            FROM {reaction} reaction
+            JOIN requested USING (post_id)
+            WHERE reaction.author_id = %(author_id)s
+            FOR UPDATE OF reaction
+        ), updated AS (
+            UPDATE {reaction} reaction
+            SET value = CASE
+                WHEN existing.value IS NOT DISTINCT FROM requested.value THEN NULL
+                ELSE requested.value
+            END
+            FROM existing JOIN requested USING (post_id)
+            WHERE reaction.id = existing.id
+            RETURNING reaction.id, reaction.post_id, reaction.value,
+                existing.value AS old_value
+        ), inserted AS (
+            INSERT INTO {reaction} (author_id, post_id, value)
+            SELECT %(author_id)s, requested.post_id, requested.value
+            FROM requested
+            WHERE NOT EXISTS (
+                SELECT 1 FROM existing WHERE existing.post_id = requested.post_id
+            )
+            ON CONFLICT (author_id, post_id) DO NOTHING
+            RETURNING id, post_id, value, NULL::varchar AS old_value
+        ), changed AS (
+            SELECT * FROM updated UNION ALL SELECT * FROM inserted
+        ), counters AS (
+            UPDATE {post} post
+            SET {counters}
+            FROM changed
+            WHERE post.id = changed.post_id
+        )
+        SELECT id, post_id, value FROM changed
+    """
+    counter_sql = (
+        "{field} = GREATEST(post.{field}"
+        " + (changed.value IS NOT DISTINCT FROM '{value}')::int"
+        " - (changed.old_value IS NOT DISTINCT FROM '{value}')::int, 0)"
+    )
+
+    def toggle(self, author, post, value):
+        return self.bulk_toggle(author, {post: value})[0]
+
+    def bulk_toggle(self, author, values):
+        """
+        Ставит или снимает реакции автора на несколько постов.
+
+        `values` - словарь {post: value}. Повторная реакция тем же значением
+        снимает ее (value становится None). Возвращает реакции в порядке постов.
+        """
+        posts = {post.pk: post for post in values}
+        pending = {post.pk: value for post, value in values.items()}
+        reactions = {}
+        sql = self.toggle_sql.format(
+            reaction=self.model._meta.db_table,
+            post=Post._meta.db_table,
+            counters=", ".join(
+                self.counter_sql.format(field=f"{value}_count", value=value)
+                for value in self.model.Values.values
+            ),
+        )
+
+        # Строка, вставленная параллельным запросом, видна только в новом
+        # снимке, поэтому конфликтующие посты обрабатываются повторно.
+        db = router.db_for_write(self.model)
+        with connections[db].cursor() as cursor:
+            while pending:
+                cursor.execute(
+                    sql,
+                    {
+                        "author_id": author.pk,
+                        "post_ids": list(pending),
+                        "values": list(pending.values()),
+                    },
+                )
+                for reaction_id, post_id, value in cursor.fetchall():
+                    reaction = self.model(
+                        id=reaction_id, author=author, post=posts[post_id], value=value
+                    )
+                    reaction._state.adding = False
+                    reaction._state.db = db
+                    reactions[post_id] = reaction
+                    del pending[post_id]
+
+        return [reactions[post_id] for post_id in posts]
+
 
 class Reaction(models.Model):
     class Values(models.TextChoices):
@@ -42,6 +208,8 @@ class Reaction(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reactions")
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="reactions")
 
+    objects = ReactionManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -52,6 +220,38 @@ class Reaction(models.Model):
         ]
 
 
+class ChatManager(models.Manager):
+    # Поиск и вставка идут по функциональному уникальному индексу
+    # users_chat_unique, поэтому порядок собеседников не важен.
+    get_or_create_pair_sql = """
+        WITH inserted AS (
+            INSERT INTO {chat} (user_1_id, user_2_id)
+            VALUES (%(user_1)s, %(user_2)s)
+            ON CONFLICT (
+                (GREATEST(user_1_id, user_2_id)), (LEAST(user_1_id, user_2_id))
+            ) DO NOTHING
+            RETURNING *
+        )
+        SELECT * FROM inserted
+        UNION ALL
+        SELECT * FROM {chat}
+        WHERE GREATEST(user_1_id, user_2_id) = GREATEST(%(user_1)s, %(user_2)s)
+            AND LEAST(user_1_id, user_2_id) = LEAST(%(user_1)s, %(user_2)s)
+        LIMIT 1
+    """
+
+    def get_or_create_pair(self, user_1, user_2):
+        sql = self.get_or_create_pair_sql.format(chat=self.model._meta.db_table)
+        params = {"user_1": user_1.pk, "user_2": user_2.pk}
+        # RawQuerySet выбирает базу как для чтения, а запрос вставляет строку.
+        manager = self.db_manager(router.db_for_write(self.model))
+        # Чат, вставленный параллельным запросом, виден только в новом снимке.
+        while True:
+            chat = next(iter(manager.raw(sql, params)), None)
+            if chat is not None:
+                return chat
+
+
 class Chat(models.Model):
     user_1 = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="chats_as_user1"
@@ -59,6 +259,25 @@ class Chat(models.Model):
     user_2 = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="chats_as_user2"
     )
+    # Денормализованные данные последнего сообщения для списка чатов.
+    last_message = models.ForeignKey(
+        "Message",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_message_content = models.TextField(null=True, blank=True)
+    last_message_author = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_message_datetime = models.DateTimeField(null=True, blank=True)
+
+    objects = ChatManager()
 
     class Meta:
         constraints = [
@@ -68,6 +287,56 @@ class Chat(models.Model):
                 name="users_chat_unique",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["user_1", "-last_message_datetime", "-id"],
+                name="chat_user_1_last_message_idx",
+            ),
+            models.Index(
+                fields=["user_2", "-last_message_datetime", "-id"],
+                name="chat_user_2_last_message_idx",
+            ),
+        ]
+
+    def push_last_message(self, message):
+        self._last_message_queryset(message).update(
+            **self._last_message_values(message)
+        )
+
+    async def apush_last_message(self, message):
+        await self._last_message_queryset(message).aupdate(
+            **self._last_message_values(message)
+        )
+
+    def _last_message_queryset(self, message):
+        return Chat.objects.filter(
+            Q(last_message_datetime__isnull=True)
+            | Q(last_message_datetime__lte=message.created_at),
+            pk=self.pk,
+        )
+
+    def _last_message_values(self, message):
+        return {
+            "last_message": message,
+            "last_message_content": message.content,
+            "last_message_author_id": message.author_id,
+            "last_message_datetime": message.created_at,
+        }
+
+    def refresh_last_message(self):
+        message = self.messages.order_by("-created_at", "-id").first()
+        self.last_message = message
+        self.last_message_content = message.content if message else None
+        self.last_message_author_id = message.author_id if message else None
+        self.last_message_datetime = message.created_at if message else None
+        self.save(
+            update_fields=[
+                "last_message",
+                "last_message_content",
+                "last_message_author",
+                "last_message_datetime",
+            ]
+        )
 
 
 class Message(models.Model):
@@ -76,3 +345,11 @@ class Message(models.Model):
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="messages")
     created_at = models.DateTimeField(auto_now_add=True)
     updated = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["chat", "created_at", "id"],
+                name="message_chat_created_at_idx",
+            ),
+        ]
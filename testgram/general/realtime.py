@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import psycopg
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection
+from rest_framework import serializers
+
+
+def chat_group_name(chat_id):
+    return f"chat_{chat_id}"
+
+
+def message_event(message_id, content, author_id, author_name, created_at):
+    return {
+        "id": message_id,
+        "content": content,
+        "author_id": author_id,
+        "author_name": author_name,
+        "created_at": serializers.DateTimeField().to_representation(created_at),
+    }
+
+
+class MessageNotifier:
+    """
+    Будит запросы, которые ждут новых сообщений в чате.
+
+    Ожидающие хранятся в памяти процесса, notify можно вызывать
+    из любого потока.
+    """
+
+    def __init__(self):
+        self._waiters = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, chat_id):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[chat_id].add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                waiters = self._waiters[chat_id]
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[chat_id]
+
+    def notify(self, chat_id):
+        self.wake(chat_id)
+
+    async def anotify(self, chat_id):
+        self.wake(chat_id)
+
+    def wake(self, chat_id):
+        with self._lock:
+            waiters = list(self._waiters.get(chat_id, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Цикл событий уже закрыт.
+                pass
+
+
+class PostgresMessageNotifier(MessageNotifier):
+    """
+    Уведомления между процессами через LISTEN/NOTIFY Postgres.
+
+    Каждый процесс держит одно соединение с LISTEN и будит своих ожидающих.
+    """
+
+    channel = "chat_messages"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listening = None
+
+    @asynccontextmanager
+    async def subscribe(self, chat_id):
+        await self.ensure_listener()
+        async with super().subscribe(chat_id) as event:
+            yield event
+
+    def notify(self, chat_id):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, str(chat_id)])
+
+    async def anotify(self, chat_id):
+        await sync_to_async(self.notify)(chat_id)
+
+    async def ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if (
+            self._listener is None
+            or self._listener.done()
+            or self._listener.get_loop() is not loop
+        ):
+            self._listening = asyncio.Event()
+            self._listener = loop.create_task(self.listen(self._listening))
+        listening = asyncio.ensure_future(self._listening.wait())
+        await asyncio.wait([listening, self._listener], return_when="FIRST_COMPLETED")
+        if not listening.done():
+            listening.cancel()
+            self._listener.result()
+
+    async def listen(self, listening):
+        settings_dict = connection.settings_dict
+        params = {
+            "dbname": settings_dict["NAME"],
+            "user": settings_dict["USER"],
+            "password": settings_dict["PASSWORD"],
+            "host": settings_dict["HOST"],
+            "port": settings_dict["PORT"],
+        }
+        async with await psycopg.AsyncConnection.connect(
+            autocommit=True, **{key: value for key, value in params.items() if value}
+        ) as listen_connection:
+            await listen_connection.execute(f"LISTEN {self.channel}")
+            listening.set()
+            async for notify in listen_connection.notifies():
+                self.wake(int(notify.payload))
+
+
+if settings.MESSAGE_NOTIFIER == "postgres":
+    message_notifier = PostgresMessageNotifier()
+else:
+    message_notifier = MessageNotifier()
+
+
+async def apublish_message(message):
+    await message_notifier.anotify(message.chat_id)
+    await send_to_chat_group(message)
+
+
+def publish_message(message):
+    message_notifier.notify(message.chat_id)
+    async_to_sync(send_to_chat_group)(message)
+
+
+async def send_to_chat_group(message):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    await channel_layer.group_send(
+        chat_group_name(message.chat_id),
+        {
+            "type": "chat.message",
+            "message": message_event(
+                message.pk,
+                message.content,
+                message.author_id,
+                message.author.first_name,
+                message.created_at,
+            ),
+        },
+    )
@@ -0,0 +1,70 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from general.api.authentication import invalidate_user_status
+from general.api.cache import invalidate_posts, short_user_cache
+from general.feed import remove_from_timelines, schedule_backfill
+from general.models import Post, User
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    invalidate_posts([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_short_user_cache(sender, instance, **kwargs):
+    short_user_cache.delete(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_status_cache(sender, instance, **kwargs):
+    invalidate_user_status(instance.pk)
+
+
+def expire_friend_count(user):
+    # Счетчик обновлен в базе через F(). Арифметика над полем загрузила бы
+    # отложенное поле (у пользователя из токена) уже с новым значением,
+    # поэтому поле сбрасывается и перечитывается при следующем обращении.
+    user.__dict__.pop("friend_count", None)
+
+
+@receiver(m2m_changed, sender=User.friends.through)
+def update_friend_count(sender, instance, action, pk_set, using, **kwargs):
+    users = User.objects.using(using)
+    friendships = sender.objects.using(using).filter(from_user=instance.pk)
+
+    if action == "post_add" and pk_set:
+        users.filter(pk=instance.pk).update(
+            friend_count=F("friend_count") + len(pk_set)
+        )
+        expire_friend_count(instance)
+        users.filter(pk__in=pk_set - {instance.pk}).update(
+            friend_count=F("friend_count") + 1
+        )
+        schedule_backfill(instance.pk, pk_set - {instance.pk})
+    elif action == "pre_remove" and pk_set:
+        # pk_set содержит все переданные id, а не только существующих друзей.
+        removed_ids = set(
+            friendships.filter(to_user__in=pk_set).values_list("to_user", flat=True)
+        )
+        if removed_ids:
+            remove_from_timelines(instance.pk, removed_ids)
+            users.filter(pk=instance.pk).update(
+                friend_count=Greatest(F("friend_count") - len(removed_ids), 0)
+            )
+            expire_friend_count(instance)
+            users.filter(pk__in=removed_ids - {instance.pk}).update(
+                friend_count=Greatest(F("friend_count") - 1, 0)
+            )
+    elif action == "pre_clear":
+        remove_from_timelines(instance.pk, friendships.values("to_user"))
+        users.filter(pk__in=friendships.values("to_user")).exclude(
+            pk=instance.pk
+        ).update(friend_count=Greatest(F("friend_count") - 1, 0))
+        users.filter(pk=instance.pk).update(friend_count=0)
+        instance.friend_count = 0